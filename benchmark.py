@@ -0,0 +1,127 @@
+"""
+File: benchmark.py
+Description: Measures how long each program module takes to import in a fresh
+interpreter and checks it against a time budget, and checks that the analysis
+modules can be imported without loading turtle or tkinter.
+Name: Matt Agger
+"""
+
+# Import os, subprocess and sys
+
+import os
+import subprocess
+import sys
+
+# Import time budgets in milliseconds (about three times the measured time, to
+# leave room for slower machines); modules not listed get the default budget
+
+DEFAULT_BUDGET = 30
+
+IMPORT_BUDGETS = {
+    'utils': 25,
+    'ranking': 25,
+    'growth': 25,
+    'drop': 25,
+    'shared': 60,
+    'harness': 40
+}
+
+# Modules of the folder that are not program modules
+
+EXCLUDED_MODULES = ('benchmark', 'rit_lib', 'test_overall')
+
+# Modules that need a display and must not be loaded by an import
+
+GRAPHICS_MODULES = ('turtle', 'tkinter')
+
+# Define functions and procedures
+
+def program_modules():
+    """
+    Finds the program modules in the folder of this module.
+    :return: a sorted list of module names.
+    """
+    folder = os.path.dirname(os.path.abspath(__file__))
+    return sorted(file[:-len(".py")] for file in os.listdir(folder)
+                  if file.endswith(".py")
+                  and file[:-len(".py")] not in EXCLUDED_MODULES)
+
+def import_budget(module):
+    """
+    Returns the import time budget of a module.
+    :param module: the name of the module.
+    :return: the budget in milliseconds.
+    """
+    return IMPORT_BUDGETS.get(module, DEFAULT_BUDGET)
+
+def import_time(module, runs=5):
+    """
+    Measures the time a module takes to import in a fresh interpreter, using
+    the interpreter's -X importtime report.
+    :param module: the name of the module being imported.
+    :param runs: the number of fresh interpreters started (the fastest run is
+                 kept, to reduce noise).
+    :return: the cumulative import time in milliseconds.
+    """
+    best = None
+    for run in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                                 "import " + module],
+                                capture_output=True, text=True)
+        for line in result.stderr.splitlines():
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].strip() == module:
+                time = int(fields[1]) / 1000
+                if best is None or time < best:
+                    best = time
+    return best
+
+def headless_import(module):
+    """
+    Checks whether a module can be imported without loading any of the
+    graphics modules.
+    :param module: the name of the module being imported.
+    :return: True if no graphics module was loaded, otherwise False.
+    """
+    result = subprocess.run([sys.executable, "-c",
+                             "import sys, " + module + "; print(any(name in "
+                             "sys.modules for name in "
+                             + repr(GRAPHICS_MODULES) + "))"],
+                            capture_output=True, text=True)
+    return result.stdout.strip() == "False"
+
+def check_import_budgets():
+    """
+    Measures the import time of every program module.
+    :return: a list of (module, time, budget) tuples for the modules whose
+             import time exceeds their budget.
+    """
+    over_budget = []
+    for module in program_modules():
+        time = import_time(module)
+        if time is None or time > import_budget(module):
+            over_budget.append((module, time, import_budget(module)))
+    return over_budget
+
+def main():
+    """
+    Prints the import time and budget of every program module, whether each
+    one imports without graphics, and the modules over their budget.
+    :return: None.
+    """
+    print("Import times (ms):")
+    for module in program_modules():
+        print(module + ":", import_time(module), "/", import_budget(module),
+              "\theadless:", headless_import(module))
+    over_budget = check_import_budgets()
+    if over_budget == []:
+        print("\nAll modules are within their import budget")
+    else:
+        print("\nOver budget:")
+        for module, time, budget in over_budget:
+            print(module + ":", time, ">", budget)
+
+# Run program code
+
+if __name__ == '__main__':
+    main()
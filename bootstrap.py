@@ -0,0 +1,160 @@
+"""
+File: bootstrap.py
+Description: Computes bootstrap confidence intervals for the median or mean
+life expectancy of every region and income category combination (and their
+rollups) in every year, spreading the groups over a pool of worker processes.
+Every group is resampled from its own seed, so the intervals are the same for
+any number of workers.
+Name: Matt Agger
+"""
+
+# Import utils, cube and random (concurrent.futures and os are imported by
+# bootstrap_intervals, which is the only function that starts processes)
+
+from utils import *
+from cube import cube_buckets
+
+import random
+
+# Define structure types for ConfidenceInterval
+
+ConfidenceInterval = struct_type("ConfidenceInterval",
+                                 (float, 'estimate'),
+                                 (float, 'low'),
+                                 (float, 'high'),
+                                 (int, 'count'))
+
+# Define functions and procedures
+
+def statistic(values, stat):
+    """
+    Computes the median or mean of a list of numbers.
+    :param values: the list of numbers (sorted in place for the median).
+    :param stat: 'median' or 'mean'.
+    :pre: the median is computed like factors.median_life_exp.
+    :return: the statistic.
+    """
+    if stat == "mean":
+        return sum(values) / len(values)
+    values.sort()
+    i = len(values) // 2
+    if len(values) % 2 == 0:
+        return (values[i] + values[i - 1]) / 2
+    return values[i]
+
+def percentile(values, q):
+    """
+    Computes a percentile of a sorted list of numbers, interpolating linearly
+    between the two closest values.
+    :param values: the sorted list of numbers.
+    :param q: the percentile, between 0 and 1.
+    :return: the percentile, or None if q is not between 0 and 1.
+    """
+    if not 0 <= q <= 1:
+        return None
+    position = (len(values) - 1) * q
+    i = int(position)
+    if i + 1 >= len(values):
+        return values[-1]
+    fraction = position - i
+    return values[i] + (values[i + 1] - values[i]) * fraction
+
+def bootstrap_group(task):
+    """
+    Resamples the values of one group with replacement and computes the
+    percentile confidence interval of their statistic. This runs in the worker
+    processes, so it takes and returns plain tuples.
+    :param task: a (bucket, values, stat, resamples, confidence, seed) tuple,
+                 where bucket is the (region, income category, year) key of
+                 the group.
+    :return: a (bucket, (estimate, low, high, count)) tuple.
+    """
+    bucket, values, stat, resamples, confidence, seed = task
+    generator = random.Random(str(seed) + ":" + repr(bucket))
+    estimates = []
+    for i in range(resamples):
+        estimates.append(statistic(generator.choices(values, k=len(values)),
+                                   stat))
+    estimates.sort()
+    alpha = (1 - confidence) / 2
+    return (bucket, (statistic(list(values), stat),
+                     percentile(estimates, alpha),
+                     percentile(estimates, 1 - alpha), len(values)))
+
+def bootstrap_intervals(data, stat="median", resamples=1000, confidence=0.95,
+                        seed=0, workers=None, years=None):
+    """
+    Computes a bootstrap confidence interval of the median or mean life
+    expectancy of every group of a given data tuple in every year.
+    :param data: the data tuple being analyzed.
+    :param stat: 'median' or 'mean'.
+    :param resamples: the number of resamples of every group.
+    :param confidence: the confidence level of the intervals (0.95 for 95%).
+    :param seed: the seed every group's resampling is derived from.
+    :param workers: the number of worker processes (the number of processors
+                    if None; 1 computes the intervals in this process).
+    :param years: if given, only these years are analyzed.
+    :pre: countries are grouped like the aggregate cube (see cube.cube_groups).
+    :return: a dictionary mapping (region, income category, year) tuples to
+             ConfidenceInterval structures, where a region or income category
+             of None means all of them, or None if the confidence level is not
+             between 0 and 1.
+    """
+    if not 0 <= confidence <= 1:
+        return None
+    buckets = cube_buckets(data, years)
+    tasks = [(bucket, buckets[bucket], stat, resamples, confidence, seed)
+             for bucket in buckets]
+    if workers == 1:
+        results = map(bootstrap_group, tasks)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        import os
+        if workers is None:
+            workers = os.cpu_count()
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(bootstrap_group, tasks,
+                                    chunksize=max(1, len(tasks)
+                                                  // (workers * 4))))
+    intervals = {}
+    for bucket, interval in results:
+        intervals[bucket] = ConfidenceInterval(*interval)
+    return intervals
+
+def group_interval(intervals, year, region=None, income=None):
+    """
+    Looks up the confidence interval of a group of countries for a specified
+    year.
+    :param intervals: the dictionary returned by bootstrap_intervals.
+    :param year: the year being referenced.
+    :param region: the region of the group (None for all regions).
+    :param income: the income category of the group (None for all income
+                   categories).
+    :return: a ConfidenceInterval structure, or None if the group has no data
+             for the year.
+    """
+    return intervals.get((region, income, year))
+
+def main():
+    """
+    Reads the data and metadata files, computes 95% confidence intervals of the
+    median life expectancy of every group, and prints those of every region for
+    a year entered by the user (or -1 to quit).
+    :return: None.
+    """
+    data = read_data("worldbank_life_expectancy")
+    intervals = bootstrap_intervals(data)
+    year = int(input("Enter year of interest (-1 to quit): "))
+    while year != -1:
+        for region in data[1].region_names:
+            interval = group_interval(intervals, year, region)
+            if interval is not None:
+                print(region + ":", interval.estimate,
+                      "(" + str(interval.low) + " - " + str(interval.high)
+                      + ")")
+        year = int(input("\nEnter year of interest (-1 to quit): "))
+
+# Run program code
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+"""
+File: catalog.py
+Description: Provides a catalog of every dataset under the data folder (every
+pair of _data.txt and _metadata.txt files), which reads a dataset the first
+time it is used and keeps the datasets in use under a memory budget, evicting
+the least recently used ones. Every dataset is saved to an on-disk cache when
+it is first read from its files, which is faster to load than the text files
+when it is used again after being evicted.
+Name: Matt Agger
+"""
+
+# Import utils, os, pickle and sys
+
+from utils import *
+
+import os
+import pickle
+import sys
+
+# Define structure types for Catalog
+
+Catalog = struct_type("Catalog",
+                      (list, 'names'),
+                      (dict, 'loaded'),
+                      (dict, 'sizes'),
+                      (int, 'budget'),
+                      (str, 'cache_dir'))
+
+# Define functions and procedures
+
+def discover_datasets():
+    """
+    Finds the partial names of every dataset under the data folder that has
+    both a data file and a metadata file.
+    :return: a sorted list of partial names (as passed to read_data).
+    """
+    names = []
+    for file in os.listdir("data"):
+        if file.endswith("_data.txt"):
+            name = file[:-len("_data.txt")]
+            if os.path.exists("data/" + name + "_metadata.txt"):
+                names.append(name)
+    return sorted(names)
+
+def new_catalog(budget=256 * 1024 * 1024, cache_dir="cache"):
+    """
+    Creates a catalog of every dataset under the data folder, without reading
+    any of them.
+    :param budget: the most memory in bytes the loaded datasets may use (the
+                   most recently used dataset is kept even if it is larger).
+    :param cache_dir: the folder evicted datasets are saved to.
+    :return: a Catalog structure.
+    """
+    return Catalog(discover_datasets(), {}, {}, budget, cache_dir)
+
+def dataset_size(data):
+    """
+    Estimates the memory used by a data tuple, counting the dictionaries,
+    names and values it holds.
+    :param data: the data tuple being measured.
+    :pre: objects shared with other datasets (such as small integers) are
+          counted as if they were not.
+    :return: the estimated size in bytes.
+    """
+    size = 0
+    for field in (data[0].countries, data[0].country_data, data[1].regions,
+                  data[1].incomes, data[1].special_notes):
+        size += sys.getsizeof(field)
+        for key in field:
+            size += sys.getsizeof(key)
+            value = field[key]
+            size += sys.getsizeof(value)
+            if isinstance(value, dict):
+                for year in value:
+                    size += sys.getsizeof(value[year])
+    for names in (data[1].region_names, data[1].income_names):
+        size += sys.getsizeof(names) + sum(sys.getsizeof(name)
+                                           for name in names)
+    return size
+
+def cache_path(catalog, name):
+    """
+    Returns the path of the on-disk cache of a dataset.
+    :param catalog: the Catalog structure being referenced.
+    :param name: the partial name of the dataset.
+    :return: the path of the cache file.
+    """
+    return os.path.join(catalog.cache_dir, name + ".pickle")
+
+def source_identities(name):
+    """
+    Returns the identities of the data and metadata files of a dataset.
+    :param name: the partial name of the dataset.
+    :return: a tuple of the two identities returned by file_identity.
+    """
+    return (file_identity("data/" + name + "_data.txt"),
+            file_identity("data/" + name + "_metadata.txt"))
+
+def cache_valid(catalog, name):
+    """
+    Checks whether the on-disk cache of a dataset exists and was saved from
+    the data and metadata files as they are now (the same inode, modification
+    time and size, so that files replaced with older timestamps are noticed).
+    :param catalog: the Catalog structure being referenced.
+    :param name: the partial name of the dataset.
+    :return: True if the cache can be used, otherwise False.
+    """
+    path = cache_path(catalog, name)
+    if not os.path.exists(path):
+        return False
+    file = open(path, "rb")
+    identities = pickle.load(file)
+    file.close()
+    return identities == source_identities(name)
+
+def save_cache(catalog, name, data, identities):
+    """
+    Saves a dataset just read from its files to the on-disk cache, after the
+    identities of the files it was read from (so that cache_valid can check
+    them without loading the dataset). Structures are saved as their plain
+    fields, since structure types cannot be pickled.
+    :param catalog: the Catalog structure being referenced.
+    :param name: the partial name of the dataset.
+    :param data: the data tuple being saved.
+    :param identities: the tuple returned by source_identities before the
+                       files were read.
+    :return: None.
+    """
+    os.makedirs(catalog.cache_dir, exist_ok=True)
+    fields = (data[0].countries, data[0].country_data, data[1].regions,
+              data[1].incomes, data[1].special_notes, data[1].num_entities,
+              data[1].num_countries, data[1].metadata_file,
+              data[1].region_names, data[1].income_names)
+    file = open(cache_path(catalog, name), "wb")
+    pickle.dump(identities, file)
+    pickle.dump(fields, file)
+    file.close()
+
+def load_cache(catalog, name):
+    """
+    Loads a dataset from the on-disk cache.
+    :param catalog: the Catalog structure being referenced.
+    :param name: the partial name of the dataset.
+    :return: a tuple containing a CountryData structure and a CountryMetadata
+             structure.
+    """
+    file = open(cache_path(catalog, name), "rb")
+    pickle.load(file)
+    fields = pickle.load(file)
+    file.close()
+    return (CountryData(fields[0], fields[1]), CountryMetadata(*fields[2:]))
+
+def evict(catalog, keep):
+    """
+    Evicts the least recently used datasets until the loaded datasets fit in
+    the memory budget.
+    :param catalog: the Catalog structure being updated.
+    :param keep: the partial name of a dataset that is never evicted.
+    :pre: the cache is never written from a loaded dataset, so changes made
+          to it in memory (e.g. by revise_data) are dropped when it is evicted.
+    :return: None.
+    """
+    used = sum(catalog.sizes[name] for name in catalog.loaded)
+    for name in list(catalog.loaded):
+        if used <= catalog.budget:
+            break
+        if name == keep:
+            continue
+        used -= catalog.sizes[name]
+        del catalog.loaded[name]
+
+def get_dataset(catalog, name):
+    """
+    Returns a dataset of the catalog, reading it (from the on-disk cache if it
+    is up to date, otherwise from its files, saving it to the cache) if it is
+    not loaded.
+    :param catalog: the Catalog structure being referenced.
+    :param name: the partial name of the dataset.
+    :return: a tuple containing a CountryData structure and a CountryMetadata
+             structure, or None if the dataset is not in the catalog.
+    """
+    if name not in catalog.names:
+        return None
+    if name in catalog.loaded:
+        data = catalog.loaded.pop(name)
+    elif cache_valid(catalog, name):
+        data = load_cache(catalog, name)
+    else:
+        identities = source_identities(name)
+        data = read_data(name)
+        save_cache(catalog, name, data, identities)
+    catalog.loaded[name] = data
+    if name not in catalog.sizes:
+        catalog.sizes[name] = dataset_size(data)
+    evict(catalog, name)
+    return data
+
+def memory_report(catalog):
+    """
+    Reports the memory use of every dataset of the catalog.
+    :param catalog: the Catalog structure being referenced.
+    :return: a list of (partial name, loaded, estimated size in bytes, cached)
+             tuples, where the size is None for datasets never loaded.
+    """
+    report = []
+    for name in catalog.names:
+        report.append((name, name in catalog.loaded, catalog.sizes.get(name),
+                       cache_valid(catalog, name)))
+    return report
+
+def main():
+    """
+    Lists the datasets of the catalog, prompts the user to enter the partial
+    name of one (or -1 to quit), loads it and prints the memory report.
+    :return: None.
+    """
+    catalog = new_catalog()
+    print("Datasets:", ", ".join(catalog.names))
+    name = input("Enter dataset (-1 to quit): ")
+    while name != "-1":
+        data = get_dataset(catalog, name)
+        if data is None:
+            print("\'" + name + "\' is not a dataset")
+        else:
+            print(name + ":", len(data[0].country_data), "countries")
+        for entry in memory_report(catalog):
+            print(entry[0].ljust(30), "loaded" if entry[1] else "      ",
+                  str(entry[2]).rjust(10), "bytes",
+                  "cached" if entry[3] else "")
+        name = input("\nEnter dataset (-1 to quit): ")
+
+# Run program code
+
+if __name__ == '__main__':
+    main()
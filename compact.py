@@ -0,0 +1,183 @@
+"""
+File: compact.py
+Description: Provides a compact storage mode for loaded data, holding each
+country's life expectancies as 32-bit floats with a validity bitmap instead of
+a dictionary of 64-bit Python floats. Compact data tuples can be passed to
+every other program task unchanged.
+
+Precision contract: a stored value is the nearest 32-bit float to the value
+read, so it differs from it by at most one part in 2 ** 24 (about 0.000005 for
+a life expectancy of 80 years). Values read back are Python floats holding
+that 32-bit value, which means exact equality with the text of the data file
+only holds in the default (uncompacted) mode.
+Name: Matt Agger
+"""
+
+# Import utils, array and collections.abc
+
+from utils import *
+
+from array import array
+from collections.abc import MutableMapping
+
+# Define classes
+
+class CompactSeries(MutableMapping):
+    """
+    A dictionary of years and values for one country, stored as one 32-bit
+    float per year from its first to its last year plus one validity bit per
+    year. Iteration is always in chronological order.
+    """
+    __slots__ = ('first', 'values', 'valid', 'size')
+
+    def __init__(self, series=None):
+        """
+        Creates a compact copy of a dictionary of years and values.
+        :param series: the dictionary being copied (empty if None).
+        """
+        self.first = 0
+        self.values = array('f')
+        self.valid = bytearray()
+        self.size = 0
+        if series:
+            years = sorted(series)
+            self._grow(years[0], years[-1])
+            for year in years:
+                self[year] = series[year]
+
+    def _grow(self, year1, year2):
+        """
+        Widens the stored span of years to include a specified range.
+        :param year1: the first year that must be stored.
+        :param year2: the last year that must be stored.
+        :return: None.
+        """
+        if len(self.values) == 0:
+            self.first = year1
+        before = max(self.first - year1, 0)
+        after = max(year2 - (self.first + len(self.values) - 1), 0)
+        if before == 0 and after == 0:
+            return
+        bits = [i for i in range(len(self.values)) if self._has(i)]
+        self.values = array('f', [0.0]) * before + self.values \
+            + array('f', [0.0]) * after
+        self.first -= before
+        self.valid = bytearray((len(self.values) + 7) // 8)
+        for i in bits:
+            self.valid[(i + before) >> 3] |= 1 << ((i + before) & 7)
+
+    def _has(self, i):
+        """
+        Returns whether a stored position holds a value.
+        :param i: the position being checked.
+        :return: True if the position's validity bit is set, otherwise False.
+        """
+        return self.valid[i >> 3] & (1 << (i & 7)) != 0
+
+    def _index(self, year):
+        """
+        Returns the stored position of a year that has a value.
+        :param year: the year being referenced.
+        :return: the position, or None if the year has no value.
+        """
+        i = year - self.first if isinstance(year, int) else -1
+        if 0 <= i < len(self.values) and self._has(i):
+            return i
+        return None
+
+    def __contains__(self, year):
+        """
+        Returns whether a year has a value.
+        :param year: the year being checked.
+        :return: True if the year has a value, otherwise False.
+        """
+        return self._index(year) is not None
+
+    def __getitem__(self, year):
+        """
+        Returns the value of a year.
+        :param year: the year being referenced.
+        :pre: raises KeyError if the year has no value.
+        :return: the value, rounded to single precision.
+        """
+        i = self._index(year)
+        if i is None:
+            raise KeyError(year)
+        return self.values[i]
+
+    def __setitem__(self, year, value):
+        """
+        Stores the value of a year, widening the stored span if needed.
+        :param year: the year being set.
+        :param value: the value being stored (rounded to single precision).
+        :return: None.
+        """
+        self._grow(year, year)
+        i = year - self.first
+        if not self._has(i):
+            self.valid[i >> 3] |= 1 << (i & 7)
+            self.size += 1
+        self.values[i] = value
+
+    def __delitem__(self, year):
+        """
+        Removes the value of a year, clearing its validity bit.
+        :param year: the year being removed.
+        :pre: raises KeyError if the year has no value.
+        :return: None.
+        """
+        i = self._index(year)
+        if i is None:
+            raise KeyError(year)
+        self.valid[i >> 3] &= ~(1 << (i & 7))
+        self.size -= 1
+
+    def __iter__(self):
+        """
+        Iterates over the years that have a value.
+        :return: an iterator of years, in ascending order.
+        """
+        for i in range(len(self.values)):
+            if self._has(i):
+                yield self.first + i
+
+    def __len__(self):
+        """
+        Returns the number of years that have a value.
+        :return: the number of years.
+        """
+        return self.size
+
+    def __repr__(self):
+        """
+        Returns a printable representation of the series.
+        :return: the series as a dictionary wrapped in CompactSeries().
+        """
+        return "CompactSeries(" + repr(dict(self)) + ")"
+
+# Define functions and procedures
+
+def compact_data(data):
+    """
+    Creates a copy of a given data tuple whose country data is held in compact
+    storage (see the precision contract above).
+    :param data: the data tuple being compacted.
+    :pre: the metadata structure is shared with the given data tuple.
+    :return: a tuple containing a CountryData structure and a CountryMetadata
+             structure.
+    """
+    country_data = {}
+    for key in data[0].country_data:
+        country_data[key] = CompactSeries(data[0].country_data[key])
+    countryData = CountryData(dict(data[0].countries), country_data)
+    return (countryData, data[1])
+
+def read_compact_data(filename):
+    """
+    Reads the data and metadata files under a given filename straight into
+    compact storage.
+    :param filename: the partial name of the data files being read.
+    :return: a tuple containing a CountryData structure and a CountryMetadata
+             structure.
+    """
+    return read_data(filename, CompactSeries)
@@ -0,0 +1,180 @@
+"""
+File: cube.py
+Description: Builds an aggregate cube of life expectancy statistics (count,
+mean, median, minimum and maximum) for every region, income category and year
+in one pass over the data, with rollups to region-only, income-only and global
+totals, so that group queries are lookups.
+Name: Matt Agger
+"""
+
+# Import utils
+
+from utils import *
+
+# Define structure types for CubeCell
+
+CubeCell = struct_type("CubeCell",
+                       (int, 'count'),
+                       (float, 'mean'),
+                       (float, 'median'),
+                       (float, 'min'),
+                       (float, 'max'))
+
+# Define functions and procedures
+
+def cube_cell(values):
+    """
+    Summarizes a list of life expectancies as a CubeCell structure.
+    :param values: the list of values being summarized (sorted in place).
+    :pre: the median is computed like factors.median_life_exp.
+    :return: a CubeCell structure.
+    """
+    values.sort()
+    i = len(values) // 2
+    if len(values) % 2 == 0:
+        median = (values[i] + values[i - 1]) / 2
+    else:
+        median = values[i]
+    return CubeCell(len(values), sum(values) / len(values), median,
+                    values[0], values[-1])
+
+def cube_groups(metadata, country_code):
+    """
+    Returns the groups of the cube that a country is aggregated into.
+    :param metadata: the CountryMetadata structure being referenced.
+    :param country_code: the code of the country being referenced.
+    :pre: non-country larger groupings (blank region) are left out of the
+          region and global totals, and those with a blank income category are
+          left out of the income totals, as with filtering on 'all'.
+    :return: a list of (region code, income category code) tuples, where a
+             code of None means all of them.
+    """
+    region = metadata.regions[country_code]
+    income = metadata.incomes[country_code]
+    groups = []
+    if region != category_code(metadata.region_names, ""):
+        groups.append((region, None))
+        groups.append((None, None))
+        if income != category_code(metadata.income_names, ""):
+            groups.append((region, income))
+    if income != category_code(metadata.income_names, ""):
+        groups.append((None, income))
+    return groups
+
+def group_names(metadata, bucket):
+    """
+    Replaces the region and income category codes of a bucket by their names.
+    :param metadata: the CountryMetadata structure being referenced.
+    :param bucket: a (region code, income category code, year) tuple.
+    :return: a (region, income category, year) tuple, keeping None for all.
+    """
+    region = bucket[0]
+    income = bucket[1]
+    if region is not None:
+        region = metadata.region_names[region]
+    if income is not None:
+        income = metadata.income_names[income]
+    return (region, income, bucket[2])
+
+def cube_buckets(data, years=None):
+    """
+    Buckets the values of the countries in a given data tuple by region code,
+    income category code and year, including the rollups.
+    :param data: the data tuple being aggregated.
+    :param years: if given, only these years are bucketed.
+    :pre: countries are grouped as described in cube_groups.
+    :return: a dictionary mapping (region, income category, year) tuples to
+             lists of values, where a region or income category of None means
+             all of them; buckets without values are left out.
+    """
+    buckets = {}
+    for key in data[0].country_data:
+        groups = cube_groups(data[1], key)
+        values = data[0].country_data[key]
+        for year in values:
+            if years is not None and year not in years:
+                continue
+            for group in groups:
+                bucket = (group[0], group[1], year)
+                if bucket not in buckets:
+                    buckets[bucket] = []
+                buckets[bucket].append(values[year])
+    named_buckets = {}
+    for bucket in buckets:
+        named_buckets[group_names(data[1], bucket)] = buckets[bucket]
+    return named_buckets
+
+def build_cube(data, years=None):
+    """
+    Buckets the values of the countries in a given data tuple by region code,
+    income category code and year, and summarizes every bucket and rollup.
+    :param data: the data tuple being aggregated.
+    :param years: if given, only these years are aggregated.
+    :pre: countries are grouped as described in cube_groups.
+    :return: a dictionary mapping (region, income category, year) tuples to
+             CubeCell structures, where a region or income category of None
+             means all of them; buckets without values are left out.
+    """
+    buckets = cube_buckets(data, years)
+    cube = {}
+    for bucket in buckets:
+        cube[bucket] = cube_cell(buckets[bucket])
+    return cube
+
+def update_cube(cube, data, changes):
+    """
+    Brings a cube up to date after the data tuple it was built from has been
+    revised, re-aggregating only the years that changed.
+    :param cube: the dictionary returned by build_cube.
+    :param data: the revised data tuple.
+    :param changes: the list of (country code, year) tuples returned by
+                    revise_data or append_years.
+    :return: None.
+    """
+    years = set()
+    for change in changes:
+        years.add(change[1])
+    for key in list(cube):
+        if key[2] in years:
+            del cube[key]
+    cube.update(build_cube(data, years))
+
+def group_life_exp(cube, year, stat, region=None, income=None):
+    """
+    Looks up one statistic of the life expectancies of a group of countries
+    for a specified year.
+    :param cube: the dictionary returned by build_cube.
+    :param year: the year being referenced.
+    :param stat: the name of the statistic ('count', 'mean', 'median', 'min'
+                 or 'max').
+    :param region: the region of the group (None for all regions).
+    :param income: the income category of the group (None for all income
+                   categories).
+    :return: the statistic, or None if the group has no data for the year.
+    """
+    if (region, income, year) not in cube:
+        return None
+    return getattr(cube[(region, income, year)], stat)
+
+def main():
+    """
+    Reads the data and metadata files, builds the cube, and prints the median
+    life expectancy of every region and income category combination for a
+    year entered by the user (or -1 to quit).
+    :return: None.
+    """
+    data = read_data("worldbank_life_expectancy")
+    cube = build_cube(data)
+    year = int(input("Enter year of interest (-1 to quit): "))
+    while year != -1:
+        for region in data[1].region_names:
+            for income in data[1].income_names:
+                median = group_life_exp(cube, year, "median", region, income)
+                if median is not None:
+                    print(region + ", " + income + ":", median)
+        year = int(input("\nEnter year of interest (-1 to quit): "))
+
+# Run program code
+
+if __name__ == '__main__':
+    main()
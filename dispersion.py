@@ -0,0 +1,168 @@
+"""
+File: dispersion.py
+Description: Measures whether countries are converging or diverging in life
+expectancy, computing the standard deviation, coefficient of variation, Gini
+index and Theil index of every region or income category (and of all of them,
+with the Theil index decomposed into within-group and between-group parts) for
+every year, from running sums gathered in one pass over each year column.
+Name: Matt Agger
+"""
+
+# Import utils and math
+
+from utils import *
+
+import math
+
+# Define structure types for Dispersion
+
+Dispersion = struct_type("Dispersion",
+                         (int, 'count'),
+                         (float, 'mean'),
+                         (float, 'std'),
+                         (float, 'cv'),
+                         (float, 'gini'),
+                         (float, 'theil'),
+                         (float, 'theil_within'),
+                         (float, 'theil_between'))
+
+# Define functions and procedures
+
+def dispersion_sums(count, total, squares, entropy, ranked):
+    """
+    Turns the running sums of a group into its dispersion statistics.
+    :param count: the number of values.
+    :param total: the sum of the values.
+    :param squares: the sum of the squared values.
+    :param entropy: the sum of every value times its natural logarithm.
+    :param ranked: the sum of every value times its rank in the group (1 is
+                   the lowest).
+    :return: a Dispersion structure, with the whole Theil index counted as
+             within-group.
+    """
+    mean = total / count
+    std = math.sqrt(max(0.0, squares / count - mean * mean))
+    gini = 2 * ranked / (count * total) - (count + 1) / count
+    theil = max(0.0, entropy / total - math.log(mean))
+    return Dispersion(count, mean, std, std / mean, gini, theil, theil, 0.0)
+
+def dispersion_data(data, by="region"):
+    """
+    Computes the dispersion statistics of the countries in a given data tuple
+    for every year, for every region (or income category) and for all of them.
+    Each year column is sorted once with its countries' group codes, and the
+    sums every statistic needs are gathered for all groups in one pass over it.
+    :param data: the data tuple being analyzed.
+    :param by: 'region' or 'income', the grouping of the decomposition.
+    :pre: non-country larger groupings (blank category) are left out, as with
+          filtering on 'all'; values must be positive.
+    :return: a dictionary mapping (group, year) tuples to Dispersion
+             structures, where a group of None means all countries; only the
+             structures of all countries split the Theil index into
+             within-group and between-group parts.
+    """
+    if by == "income":
+        categories = data[1].incomes
+        names = data[1].income_names
+    else:
+        categories = data[1].regions
+        names = data[1].region_names
+    blank = category_code(names, "")
+    years = data_years(data)
+    codes, rows = data_matrix(data, years)
+    groups = [categories.get(code, blank) for code in codes]
+    table = {}
+    for j in range(len(years)):
+        column = sorted((rows[i][j], groups[i]) for i in range(len(codes))
+                        if rows[i][j] is not None and groups[i] != blank)
+        if column == []:
+            continue
+        sums = {}
+        for value, group in column:
+            if group not in sums:
+                sums[group] = [0, 0.0, 0.0, 0.0, 0.0]
+            group_sums = sums[group]
+            group_sums[0] += 1
+            group_sums[1] += value
+            group_sums[2] += value * value
+            group_sums[3] += value * math.log(value)
+            group_sums[4] += value * group_sums[0]
+        ranked = 0.0
+        for k in range(len(column)):
+            ranked += column[k][0] * (k + 1)
+        overall = dispersion_sums(len(column),
+                                  sum(sums[g][1] for g in sums),
+                                  sum(sums[g][2] for g in sums),
+                                  sum(sums[g][3] for g in sums), ranked)
+        total = overall.mean * overall.count
+        within = 0.0
+        between = 0.0
+        for group in sums:
+            cell = dispersion_sums(*sums[group])
+            table[(names[group], years[j])] = cell
+            share = cell.count * cell.mean / total
+            within += share * cell.theil
+            between += share * math.log(cell.mean / overall.mean)
+        overall.theil_within = within
+        overall.theil_between = between
+        table[(None, years[j])] = overall
+    return table
+
+def dispersion_series(table, stat, group=None):
+    """
+    Lays one statistic of a group out as a series for charting.
+    :param table: the dictionary returned by dispersion_data.
+    :param stat: the name of the statistic ('std', 'cv', 'gini', 'theil',
+                 'theil_within', 'theil_between', 'mean' or 'count').
+    :param group: the region or income category (None for all countries).
+    :return: a list of (year, value) tuples, sorted by year.
+    """
+    series = []
+    for key in table:
+        if key[0] == group:
+            series.append((key[1], getattr(table[key], stat)))
+    return sorted(series)
+
+def sorted_dispersion_data(table, year, stat):
+    """
+    Creates CountryValue structures for the groups in a dispersion table and
+    one of their statistics in a specified year, and sorts them in descending
+    order (most dispersed first).
+    :param table: the dictionary returned by dispersion_data.
+    :param year: the year being referenced.
+    :param stat: the name of the statistic.
+    :return: a list of CountryValue structures (named after the groups),
+             sorted in descending order.
+    """
+    dispersion_sdata = []
+    for key in table:
+        if key[1] == year and key[0] is not None:
+            dispersion_sdata.append(CountryValue(key[0],
+                                                 getattr(table[key], stat)))
+    return sorted(dispersion_sdata, key=country_value, reverse=True)
+
+def main():
+    """
+    Reads the data and metadata files; prompts the user to enter a grouping
+    (region or income, or -1 to quit); prints the dispersion of all countries
+    and the share of the Theil index between groups every five years; and
+    repeats the process again.
+    :return: None.
+    """
+    data = read_data("worldbank_life_expectancy")
+    by = input("Enter grouping (region or income, -1 to quit): ")
+    while by != "-1":
+        table = dispersion_data(data, by)
+        print("\nYear  Std     CV      Gini    Theil   Between")
+        for year in range(1960, 2016, 5):
+            if (None, year) in table:
+                cell = table[(None, year)]
+                print(year, "%.4f" % cell.std, "%.4f" % cell.cv,
+                      "%.4f" % cell.gini, "%.5f" % cell.theil,
+                      "%.1f%%" % (100 * cell.theil_between / cell.theil))
+        by = input("\nEnter grouping (region or income, -1 to quit): ")
+
+# Run program code
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,8 @@
 File: drop.py
 Description: Identifies the ten worst drops in life expectancy throughout the
 1960-2015 time frame, only filtering the data to remove non-country (larger
-grouping) entries.
+grouping) entries, and finds every drawdown episode above a depth or duration
+threshold.
 Name: Matt Agger
 """
 
@@ -62,6 +63,52 @@ def sorted_drop_data(data):
         drop_data.append(Range(country, year1, year2, value1, value2))
     return sorted(drop_data, key=range_value_drop)
 
+def sorted_drawdown_data(data, min_depth=0.0, min_duration=1):
+    """
+    Finds every drawdown episode in the life expectancies of the countries in a
+    given data tuple, creates a Drawdown structure for each one (peak year,
+    trough year, recovery year, peak value and trough value), appends them to a
+    single list, and sorts the list in ascending order (deepest first). Each
+    series is scanned once, keeping only the running peak and trough.
+    :param data: the data tuple being analyzed.
+    :param min_depth: the smallest drop from peak to trough that is reported.
+    :param min_duration: the fewest years from peak to recovery (or to the last
+                         year, if there is no recovery) that are reported.
+    :pre: an episode starts when a value falls below the running peak and ends
+          when a later value reaches the peak again; episodes that never
+          recover have a recovery year of None.
+    :return: a list of Drawdown structures, sorted in ascending order.
+    """
+    drawdown_data = []
+    if data is None:
+        return drawdown_data
+    for key1 in data[0].country_data:
+        country = data[0].countries[key1]
+        peakYr = None
+        peakVal = 0.0
+        troughYr = None
+        troughVal = 0.0
+        lastYr = None
+        for key2 in data[0].country_data[key1]:
+            value = data[0].country_data[key1][key2]
+            lastYr = key2
+            if peakYr is None or value >= peakVal:
+                if troughYr is not None and peakVal - troughVal >= min_depth \
+                        and key2 - peakYr >= min_duration:
+                    drawdown_data.append(Drawdown(country, peakYr, troughYr,
+                                                  key2, peakVal, troughVal))
+                peakYr = key2
+                peakVal = value
+                troughYr = None
+            elif troughYr is None or value < troughVal:
+                troughYr = key2
+                troughVal = value
+        if troughYr is not None and peakVal - troughVal >= min_depth \
+                and lastYr - peakYr >= min_duration:
+            drawdown_data.append(Drawdown(country, peakYr, troughYr, None,
+                                          peakVal, troughVal))
+    return sorted(drawdown_data, key=drawdown_depth)
+
 def main():
     """
     Reads the data and metadata files and prints the top ten worst life
@@ -0,0 +1,172 @@
+"""
+File: events.py
+Description: Builds an index of threshold-crossing events in life expectancy
+(the first year a country reached a threshold, the last year it crossed it
+again from below, and the number of years spent above and below it) for many
+thresholds and every country in one pass over each series, and ranks
+countries by crossing year, potentially filtering the data to consider only a
+particular region and/or income category.
+Name: Matt Agger
+"""
+
+# Import utils and bisect
+
+from utils import *
+
+import bisect
+
+# Define structure types for CrossingEvent
+
+CrossingEvent = struct_type("CrossingEvent",
+                            (str, 'country'),
+                            (float, 'threshold'),
+                            ((int, NoneType), 'first_year'),
+                            ((int, NoneType), 'last_year'),
+                            (int, 'years_above'),
+                            (int, 'years_below'))
+
+# Define functions and procedures
+
+def series_events(country, series, thresholds):
+    """
+    Finds the crossing events of one country's series for every threshold.
+    Each value is placed among the sorted thresholds once (by bisection), so a
+    year only costs work for the thresholds whose side actually changed.
+    :param country: the name of the country.
+    :param series: the dictionary of years and life expectancies being scanned.
+    :param thresholds: the sorted list of thresholds.
+    :pre: a value equal to a threshold counts as above it; a country already
+          above a threshold in its first year crossed it that year.
+    :return: a list of CrossingEvent structures, one per threshold.
+    """
+    first = [None] * len(thresholds)
+    last = [None] * len(thresholds)
+    counts = [0] * (len(thresholds) + 1)
+    reached = 0
+    previous = 0
+    for year in series:
+        level = bisect.bisect_right(thresholds, series[year])
+        counts[level] += 1
+        for t in range(reached, level):
+            first[t] = year
+        for t in range(previous, level):
+            last[t] = year
+        reached = max(reached, level)
+        previous = level
+    events = []
+    above = 0
+    for t in range(len(thresholds) - 1, -1, -1):
+        above += counts[t + 1]
+        events.append(CrossingEvent(country, thresholds[t], first[t], last[t],
+                                    above, len(series) - above))
+    events.reverse()
+    return events
+
+def event_index(data, thresholds):
+    """
+    Builds the crossing events of every country in a given data tuple for
+    every threshold.
+    :param data: the data tuple being indexed.
+    :param thresholds: the list of thresholds (life expectancies).
+    :return: a dictionary mapping each threshold to a dictionary of country
+             codes and CrossingEvent structures.
+    """
+    thresholds = sorted(set(float(threshold) for threshold in thresholds))
+    index = {}
+    for threshold in thresholds:
+        index[threshold] = {}
+    for key in data[0].country_data:
+        events = series_events(data[0].countries[key],
+                               data[0].country_data[key], thresholds)
+        for event in events:
+            index[event.threshold][key] = event
+    return index
+
+def update_event_index(index, data, changes):
+    """
+    Brings an event index up to date after the data tuple it was built from
+    has been revised, re-scanning only the countries that changed.
+    :param index: the dictionary returned by event_index.
+    :param data: the revised data tuple.
+    :param changes: the list of (country code, year) tuples returned by
+                    revise_data or append_years.
+    :pre: changes for countries that are not in the data tuple are ignored.
+    :return: None.
+    """
+    thresholds = sorted(index)
+    codes = set()
+    for change in changes:
+        if change[0] in data[0].country_data:
+            codes.add(change[0])
+    for key in codes:
+        events = series_events(data[0].countries[key],
+                               data[0].country_data[key], thresholds)
+        for event in events:
+            index[event.threshold][key] = event
+
+def sorted_event_data(data, index, threshold, event="first_year"):
+    """
+    Creates CountryValue structures for the countries in a given data tuple and
+    the year they crossed a threshold, appends them to a list, and sorts the
+    list in ascending order (earliest first).
+    :param data: the data tuple the index was built from, or a filtered data
+                 tuple of it (filter_region, filter_income).
+    :param index: the dictionary returned by event_index.
+    :param threshold: the threshold being referenced.
+    :param event: 'first_year' or 'last_year'.
+    :pre: countries that never reached the threshold are not included.
+    :return: a list of CountryValue structures, sorted in ascending order, or
+             None if the threshold is not in the index.
+    """
+    threshold = float(threshold)
+    if threshold not in index:
+        return None
+    event_data = []
+    if data is None:
+        return event_data
+    for key in data[0].country_data:
+        if key in index[threshold]:
+            year = getattr(index[threshold][key], event)
+            if year is not None:
+                event_data.append(CountryValue(data[0].countries[key],
+                                               float(year)))
+    return sorted(event_data, key=country_value)
+
+def main():
+    """
+    Reads the data and metadata files, indexes the thresholds 50 to 80 in steps
+    of 5, and prompts the user to enter a threshold (or -1 to quit), a region,
+    and an income category; prints the first ten countries to reach the
+    threshold in the filtered data; and repeats the process again.
+    :return: None.
+    """
+    data = read_data("worldbank_life_expectancy")
+    index = event_index(data, range(50, 85, 5))
+    threshold = float(input("Enter threshold (-1 to quit): "))
+    while threshold != -1:
+        if threshold not in index:
+            print("Indexed thresholds are", sorted(index))
+        else:
+            region = input("Enter region (type 'all' to consider all): ")
+            region_fdata = filter_region(data, region)
+            if region_fdata is None:
+                print("\'" + region + "\' is not a valid region")
+            else:
+                income = input("Enter income category "
+                               "(type 'all' to consider all): ")
+                income_fdata = filter_income(region_fdata, income)
+                if income_fdata is None:
+                    print("\'" + income + "\' is not a valid income category")
+                else:
+                    event_sdata = sorted_event_data(income_fdata, index,
+                                                    threshold)
+                    print("\nFirst to reach", threshold)
+                    for i in range(min(10, len(event_sdata))):
+                        print(str(i + 1) + ": " + event_sdata[i].country,
+                              int(event_sdata[i].value))
+        threshold = float(input("\nEnter threshold (-1 to quit): "))
+
+# Run program code
+
+if __name__ == '__main__':
+    main()
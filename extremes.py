@@ -0,0 +1,227 @@
+"""
+File: extremes.py
+Description: Builds sparse tables over every country's series once, so that
+the minimum and maximum life expectancy of a country between any two years,
+and the years they occurred, are answered in constant time, for one country or
+for every country at once.
+Name: Matt Agger
+"""
+
+# Import utils and bisect
+
+from utils import *
+
+import bisect
+
+# Define structure types for RangeIndex and RangeExtremes
+
+RangeIndex = struct_type("RangeIndex",
+                         (list, 'years'),
+                         (list, 'codes'),
+                         (dict, 'positions'),
+                         (list, 'rows'),
+                         (list, 'mins'),
+                         (list, 'maxs'))
+
+RangeExtremes = struct_type("RangeExtremes",
+                            (str, 'code'),
+                            (float, 'min'),
+                            (int, 'min_year'),
+                            (float, 'max'),
+                            (int, 'max_year'))
+
+# Define functions and procedures
+
+def lower(value1, value2):
+    """
+    Compares two values for a sparse table of minimums.
+    :param value1: the value of the earlier year.
+    :param value2: the value of the later year.
+    :return: True if the first value is kept (it is not higher).
+    """
+    return value1 <= value2
+
+def higher(value1, value2):
+    """
+    Compares two values for a sparse table of maximums.
+    :param value1: the value of the earlier year.
+    :param value2: the value of the later year.
+    :return: True if the first value is kept (it is not lower).
+    """
+    return value1 >= value2
+
+def sparse_table(row, better):
+    """
+    Builds a sparse table over one row of the countries x years matrix, where
+    level k holds, for every column j, the column of the best value among the
+    columns j to j + 2 ** k - 1.
+    :param row: the list of values (None for missing years).
+    :param better: lower or higher.
+    :return: a list of levels, each a list of columns (None if every value in
+             the span is missing).
+    """
+    level = [j if row[j] is not None else None for j in range(len(row))]
+    table = [level]
+    span = 1
+    while span * 2 <= len(row):
+        previous = level
+        level = []
+        for j in range(len(row) - span * 2 + 1):
+            left = previous[j]
+            right = previous[j + span]
+            if right is None or (left is not None
+                                 and better(row[left], row[right])):
+                level.append(left)
+            else:
+                level.append(right)
+        table.append(level)
+        span *= 2
+    return table
+
+def range_index(data):
+    """
+    Builds the sparse tables of minimums and maximums of every country in a
+    given data tuple.
+    :param data: the data tuple being indexed.
+    :return: a RangeIndex structure.
+    """
+    years = data_years(data)
+    codes, rows = data_matrix(data, years)
+    positions = {}
+    mins = []
+    maxs = []
+    for i in range(len(codes)):
+        positions[codes[i]] = i
+        mins.append(sparse_table(rows[i], lower))
+        maxs.append(sparse_table(rows[i], higher))
+    return RangeIndex(years, codes, positions, rows, mins, maxs)
+
+def table_query(table, row, j1, j2, better):
+    """
+    Finds the column of the best value between two columns of a row, from the
+    two overlapping spans of the sparse table that cover them.
+    :param table: the sparse table returned by sparse_table for the row.
+    :param row: the list of values.
+    :param j1: the first column.
+    :param j2: the last column.
+    :param better: the function the sparse table was built with.
+    :return: the column, or None if every value between the columns is missing.
+    """
+    k = (j2 - j1 + 1).bit_length() - 1
+    left = table[k][j1]
+    right = table[k][j2 - (1 << k) + 1]
+    if right is None or (left is not None and better(row[left], row[right])):
+        return left
+    return right
+
+def window_columns(index, year1, year2):
+    """
+    Converts a window of years into the columns of a range index.
+    :param index: the RangeIndex structure being referenced.
+    :param year1: the starting year of the window.
+    :param year2: the ending year of the window.
+    :return: a (first column, last column) tuple, or None if no year of the
+             index is in the window.
+    """
+    j1 = bisect.bisect_left(index.years, year1)
+    j2 = bisect.bisect_right(index.years, year2) - 1
+    if j1 > j2:
+        return None
+    return (j1, j2)
+
+def range_extremes(index, code, year1, year2):
+    """
+    Finds the minimum and maximum life expectancy of a country between two
+    years (inclusive) and the years they occurred.
+    :param index: the RangeIndex structure being referenced.
+    :param code: the code of the country being referenced.
+    :param year1: the starting year of the window.
+    :param year2: the ending year of the window.
+    :pre: ties are resolved in favor of the earliest year.
+    :return: a RangeExtremes structure, or None if the country has no data in
+             the window.
+    """
+    if code not in index.positions:
+        return None
+    columns = window_columns(index, year1, year2)
+    if columns is None:
+        return None
+    i = index.positions[code]
+    row = index.rows[i]
+    low = table_query(index.mins[i], row, columns[0], columns[1], lower)
+    if low is None:
+        return None
+    high = table_query(index.maxs[i], row, columns[0], columns[1], higher)
+    return RangeExtremes(code, row[low], index.years[low],
+                         row[high], index.years[high])
+
+def batch_extremes(index, year1, year2, codes=None):
+    """
+    Finds the minimum and maximum life expectancy between two years for every
+    country of a range index (or of a list of country codes).
+    :param index: the RangeIndex structure being referenced.
+    :param year1: the starting year of the window.
+    :param year2: the ending year of the window.
+    :param codes: if given, the country codes being referenced (e.g. those of a
+                  filtered data tuple).
+    :return: a dictionary mapping country codes to RangeExtremes structures,
+             leaving out the countries without data in the window.
+    """
+    extremes = {}
+    if codes is None:
+        codes = index.codes
+    for code in codes:
+        result = range_extremes(index, code, year1, year2)
+        if result is not None:
+            extremes[code] = result
+    return extremes
+
+def sorted_extremes_data(data, index, year1, year2, stat):
+    """
+    Creates CountryValue structures for the countries in a given data tuple and
+    their minimum or maximum life expectancy between two years, appends them to
+    a list, and sorts the list in descending order (highest to lowest).
+    :param data: the data tuple the index was built from, or a filtered data
+                 tuple of it.
+    :param index: the RangeIndex structure being referenced.
+    :param year1: the starting year of the window.
+    :param year2: the ending year of the window.
+    :param stat: 'min' or 'max'.
+    :return: a list of CountryValue structures, sorted in descending order.
+    """
+    extremes_data = []
+    if data is None:
+        return extremes_data
+    extremes = batch_extremes(index, year1, year2, list(data[0].country_data))
+    for code in extremes:
+        extremes_data.append(CountryValue(data[0].countries[code],
+                                          getattr(extremes[code], stat)))
+    return sorted(extremes_data, key=country_value, reverse=True)
+
+def main():
+    """
+    Reads the data and metadata files, builds the range index, and prompts the
+    user to enter a country code (or -1 to quit) and two years; prints the
+    country's best and worst year in that window; and repeats the process
+    again.
+    :return: None.
+    """
+    data = read_data("worldbank_life_expectancy")
+    index = range_index(data)
+    code = input("Enter country code (-1 to quit): ")
+    while code != "-1":
+        year1 = int(input("Enter starting year: "))
+        year2 = int(input("Enter ending year: "))
+        extremes = range_extremes(index, code, year1, year2)
+        if extremes is None:
+            print("No data for", code, "from", year1, "to", year2)
+        else:
+            print(data[0].countries[code])
+            print("Best year:", extremes.max_year, extremes.max)
+            print("Worst year:", extremes.min_year, extremes.min)
+        code = input("\nEnter country code (-1 to quit): ")
+
+# Run program code
+
+if __name__ == '__main__':
+    main()
@@ -6,11 +6,11 @@ visualization of this data.
 Name: Matt Agger
 """
 
-# Import utils and turtle
+# Import utils and cube (turtle is imported by the drawing functions, so that
+# the analysis functions can be used without a display)
 
 from ranking import *
-
-import turtle as t
+from cube import *
 
 # Define functions and procedures
 
@@ -20,6 +20,7 @@ def choose_color(num):
     :param num: the number being called.
     :return: None.
     """
+    import turtle as t
     if num == 0:
         t.pencolor("red")
     elif num == 1:
@@ -78,6 +79,7 @@ def init_legend(title):
     :post: the appropriate legend is drawn based on the given title.
     :return: None.
     """
+    import turtle as t
     if title == "Income Category":
         for i in range(4):
             choose_color(i)
@@ -106,6 +108,7 @@ def init_graph(title):
            respectively, based on the given title.
     :return: None.
     """
+    import turtle as t
     t.reset()
     t.setup(700, 700)
     t.title("Life Expectancy versus " + title)
@@ -151,42 +154,82 @@ def median_life_exp(data, year):
     else:
         return ranking_sdata[i].value
 
-def plot_graph(title, data):
+def plot_band(intervals, region=None, income=None):
+    """
+    Plots the lower and upper bounds of the confidence intervals of a group's
+    median life expectancy throughout the 1960-2015 time frame, as thin lines
+    in the current pen color.
+    :param intervals: the dictionary returned by bootstrap_intervals.
+    :param region: the region of the group (None for all regions).
+    :param income: the income category of the group (None for all income
+                   categories).
+    :pre: the turtle window is initialized and the pen is up.
+    :return: None.
+    """
+    import turtle as t
+    t.pensize(1)
+    for bound in ("low", "high"):
+        for year in range(1960, 2016):
+            interval = intervals.get((region, income, year))
+            if interval is not None:
+                t.setpos(((year - 1960) * 10) - 250,
+                         (getattr(interval, bound) * 6) - 290)
+                t.down()
+        t.up()
+    t.pensize(2)
+
+def plot_graph(title, data, cube=None, intervals=None):
     """
     Plots the graph for the median life expectancies of either various income
     categories or various regions throughout the 1960-2015 time frame.
     :param title: the title of the turtle window.
     :param data: the data tuple being plotted.
+    :param cube: the dictionary returned by build_cube for the data tuple (it
+                 is built here if None).
+    :param intervals: if given, the dictionary returned by bootstrap_intervals
+                      for the data tuple, whose bounds are drawn as a band
+                      around every median line.
     :pre: the turtle window is initialized.
     :post: the appropriate graph is drawn based on the given title.
     :return: None.
     """
+    import turtle as t
+    if cube is None:
+        cube = build_cube(data)
     if title == "Income Category":
         for i in range(4):
-            income_fdata = filter_income(data, choose_income(i))
-            medianLifeExp = median_life_exp(income_fdata, 1960)
+            income = choose_income(i)
+            if intervals is not None:
+                choose_color(i)
+                plot_band(intervals, income=income)
+            medianLifeExp = group_life_exp(cube, 1960, "median",
+                                           income=income)
             t.setpos(-250, -290)
             choose_color(i)
             if medianLifeExp is not None:
                 t.setpos(-250, (medianLifeExp * 6) - 290)
             t.down()
             for year in range(1961, 2016):
-                medianLifeExp = median_life_exp(income_fdata, year)
+                medianLifeExp = group_life_exp(cube, year, "median",
+                                               income=income)
                 if medianLifeExp is not None:
                     t.setpos(((year - 1960) * 10) - 250,
                              (medianLifeExp * 6) - 290)
             t.up()
     else:
         for i in range(7):
-            region_fdata = filter_region(data, choose_region(i))
-            medianLifeExp = median_life_exp(region_fdata, 1960)
+            region = choose_region(i)
+            if intervals is not None:
+                choose_color(i)
+                plot_band(intervals, region)
+            medianLifeExp = group_life_exp(cube, 1960, "median", region)
             t.setpos(-250, -290)
             choose_color(i)
             if medianLifeExp is not None:
                 t.setpos(-250, (medianLifeExp * 6) - 290)
             t.down()
             for year in range(1961, 2016):
-                medianLifeExp = median_life_exp(region_fdata, year)
+                medianLifeExp = group_life_exp(cube, year, "median", region)
                 if medianLifeExp is not None:
                     t.setpos(((year - 1960) * 10) - 250,
                              (medianLifeExp * 6) - 290)
@@ -201,14 +244,16 @@ def main():
     graph for the regions on the turtle window.
     :return: None.
     """
+    import turtle as t
     data = read_data("worldbank_life_expectancy")
+    cube = build_cube(data)
     title = "Income Category"
     init_graph(title)
-    plot_graph(title, data)
+    plot_graph(title, data, cube)
     input("Hit enter to continue...")
     title = "Region"
     init_graph(title)
-    plot_graph(title, data)
+    plot_graph(title, data, cube)
     t.done()
 
 # Run program code
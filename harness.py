@@ -0,0 +1,255 @@
+"""
+File: harness.py
+Description: Differential correctness harness that runs the original program
+tasks (ranking, growth, drop and median) as a reference oracle against any
+alternative engine, over the real data and randomly generated data, for every
+region and income category combination and every year. It reports every
+result that differs (compared exactly, bit for bit) and the time each engine
+took, side by side.
+Name: Matt Agger
+"""
+
+# Import utils, ranking, growth, drop, factors, quantiles, random and time
+
+from utils import *
+
+import ranking
+import growth
+import drop
+import factors
+import quantiles
+import random
+import time
+
+# Define structure types for Mismatch and EngineResult
+
+Mismatch = struct_type("Mismatch",
+                       (str, 'label'),
+                       (object, 'expected'),
+                       (object, 'actual'))
+
+EngineResult = struct_type("EngineResult",
+                           (str, 'task'),
+                           (str, 'engine'),
+                           (int, 'cases'),
+                           (list, 'mismatches'),
+                           (float, 'seconds'))
+
+# The reference engine: the original pure-Python implementation of each task
+
+REFERENCE_ENGINE = {
+    'sorted_ranking_data': ranking.sorted_ranking_data,
+    'sorted_growth_data': growth.sorted_growth_data,
+    'sorted_drop_data': drop.sorted_drop_data,
+    'median_life_exp': factors.median_life_exp
+}
+
+# Define functions and procedures
+
+def index_median_life_exp(data, year):
+    """
+    Computes the median life expectancy like factors.median_life_exp, from a
+    quantile index instead of a full ranking (an alternative engine).
+    :param data: the data tuple being analyzed.
+    :param year: the year being referenced.
+    :return: the median life expectancy.
+    """
+    return quantiles.quantile_life_exp(quantiles.quantile_index(data), year,
+                                       0.5)
+
+# An alternative engine (only the tasks it provides are compared)
+
+INDEX_ENGINE = {
+    'median_life_exp': index_median_life_exp
+}
+
+def random_data(seed, num_countries=60, first_year=1960, last_year=2015):
+    """
+    Generates a random data tuple with the same structure as the one read by
+    read_data, including missing years, tied values, non-country groupings
+    and every category.
+    :param seed: the seed of the random generator, so runs are reproducible.
+    :param num_countries: the number of countries being generated.
+    :param first_year: the first year of the data.
+    :param last_year: the last year of the data.
+    :return: a tuple containing a CountryData structure and a CountryMetadata
+             structure.
+    """
+    generator = random.Random(seed)
+    region_names = ["", "Region A", "Region B", "Region C"]
+    income_names = ["", "High income", "Low income"]
+    countries = {}
+    country_data = {}
+    regions = {}
+    incomes = {}
+    special_notes = {}
+    num_countries_found = 0
+    for i in range(num_countries):
+        code = "C" + str(i).zfill(2)
+        countries[code] = "Country " + str(i)
+        value = generator.uniform(30, 70)
+        data = {}
+        for year in range(first_year, last_year + 1):
+            value += generator.choice((-3.0, -0.5, 0.0, 0.25, 0.5, 1.0))
+            if generator.random() > 0.1:
+                data[year] = round(value, generator.choice((0, 2, 8)))
+        country_data[code] = data
+        if generator.random() < 0.1:
+            regions[code] = 0
+            incomes[code] = 0
+        else:
+            regions[code] = generator.randrange(1, len(region_names))
+            incomes[code] = generator.randrange(1, len(income_names))
+            num_countries_found += 1
+        special_notes[code] = (0, 0)
+    countryData = CountryData(countries, country_data)
+    countryMetadata = CountryMetadata(regions, incomes, special_notes,
+                                      num_countries, num_countries_found, "",
+                                      region_names, income_names)
+    return (countryData, countryMetadata)
+
+def filtered_groups(data):
+    """
+    Filters a given data tuple for every region and income category
+    combination, including 'all'.
+    :param data: the data tuple being filtered.
+    :return: a list of (label, filtered data tuple) tuples, leaving out the
+             combinations without countries.
+    """
+    groups = []
+    for region in ["all"] + [name for name in data[1].region_names
+                             if name != ""]:
+        region_fdata = filter_region(data, region)
+        if region_fdata is None:
+            continue
+        for income in ["all"] + [name for name in data[1].income_names
+                                 if name != ""]:
+            income_fdata = filter_income(region_fdata, income)
+            if income_fdata is not None:
+                groups.append((region + " / " + income, income_fdata))
+    return groups
+
+def task_cases(task, groups, years):
+    """
+    Lists the argument tuples a task is run with.
+    :param task: the name of the task.
+    :param groups: the list returned by filtered_groups.
+    :param years: the years of the data.
+    :return: a list of (label, arguments) tuples.
+    """
+    cases = []
+    for label, fdata in groups:
+        if task == 'sorted_drop_data':
+            cases.append((label, (fdata,)))
+        elif task == 'sorted_growth_data':
+            for i in range(len(years)):
+                for j in range(i + 1, len(years), 5):
+                    cases.append((label + " " + str(years[i]) + "-"
+                                  + str(years[j]),
+                                  (fdata, years[i], years[j])))
+        else:
+            for year in years:
+                cases.append((label + " " + str(year), (fdata, year)))
+    return cases
+
+def compare_engines(data, engines):
+    """
+    Runs every task of the reference engine and of each alternative engine on
+    the same cases over a given data tuple, and compares the results exactly.
+    :param data: the data tuple being analyzed.
+    :param engines: a dictionary mapping engine names to dictionaries of task
+                    names and functions; tasks an engine does not provide are
+                    not compared for it.
+    :return: a list of EngineResult structures, the reference engine first for
+             every task; the mismatches are Mismatch structures holding the
+             label and both results of every differing case.
+    """
+    groups = filtered_groups(data)
+    years = data_years(data)
+    results = []
+    for task in REFERENCE_ENGINE:
+        cases = task_cases(task, groups, years)
+        start = time.perf_counter()
+        expected = [REFERENCE_ENGINE[task](*arguments)
+                    for label, arguments in cases]
+        results.append(EngineResult(task, "reference", len(cases), [],
+                                    time.perf_counter() - start))
+        for name in engines:
+            if task not in engines[name]:
+                continue
+            function = engines[name][task]
+            mismatches = []
+            start = time.perf_counter()
+            actual = [function(*arguments) for label, arguments in cases]
+            seconds = time.perf_counter() - start
+            for i in range(len(cases)):
+                if actual[i] != expected[i]:
+                    mismatches.append(Mismatch(cases[i][0], expected[i],
+                                               actual[i]))
+            results.append(EngineResult(task, name, len(cases), mismatches,
+                                        seconds))
+    return results
+
+def first_difference(expected, actual):
+    """
+    Finds the first difference between the results of two engines.
+    :param expected: the result of the reference engine.
+    :param actual: the result of the alternative engine.
+    :return: a tuple containing the position of the first differing item (None
+             if the results are not both lists) and the two items there (None
+             past the end of a list).
+    """
+    if not isinstance(expected, list) or not isinstance(actual, list):
+        return (None, expected, actual)
+    for i in range(max(len(expected), len(actual))):
+        item1 = expected[i] if i < len(expected) else None
+        item2 = actual[i] if i < len(actual) else None
+        if item1 != item2:
+            return (i, item1, item2)
+    return (None, expected, actual)
+
+def run_harness(engines, seeds=(1, 2, 3)):
+    """
+    Compares alternative engines against the reference engine over the real
+    data and over random data generated from each seed.
+    :param engines: a dictionary mapping engine names to dictionaries of task
+                    names and functions.
+    :param seeds: the seeds of the random data tuples.
+    :return: a dictionary mapping each dataset label to the list of
+             EngineResult structures returned by compare_engines.
+    """
+    datasets = {"worldbank_life_expectancy":
+                read_data("worldbank_life_expectancy")}
+    for seed in seeds:
+        datasets["random " + str(seed)] = random_data(seed)
+    reports = {}
+    for label in datasets:
+        reports[label] = compare_engines(datasets[label], engines)
+    return reports
+
+def main():
+    """
+    Compares the alternative engines in this module against the reference
+    engine and prints, for every dataset and task, each engine's time and
+    number of differing cases, and the first difference of the first cases.
+    :return: None.
+    """
+    reports = run_harness({"index": INDEX_ENGINE})
+    for label in reports:
+        print("\n" + label)
+        for result in reports[label]:
+            print(result.task.ljust(20), result.engine.ljust(10),
+                  str(result.cases).rjust(6), "cases",
+                  ("%.4f" % result.seconds).rjust(9), "s",
+                  str(len(result.mismatches)).rjust(5), "mismatches")
+            for mismatch in result.mismatches[:10]:
+                position, item1, item2 = first_difference(mismatch.expected,
+                                                          mismatch.actual)
+                print("    differs:", mismatch.label,
+                      "" if position is None else "at " + str(position),
+                      "expected", item1, "got", item2)
+
+# Run program code
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+File: quality.py
+Description: Scans loaded data for suspicious values before they reach the
+rankings and drop detection: values out of a plausible range, year-to-year
+jumps that are far from the usual change, duplicated country codes, and codes
+that appear in only one of the data and metadata files.
+Name: Matt Agger
+"""
+
+# Import utils
+
+from utils import *
+
+# Define structure types for QualityIssue
+
+QualityIssue = struct_type("QualityIssue",
+                           (str, 'check'),
+                           (str, 'code'),
+                           ((int, NoneType), 'year'),
+                           ((float, NoneType), 'value'))
+
+# Define functions and procedures
+
+def median_value(values):
+    """
+    Computes the median of a list of numbers.
+    :param values: the list of numbers (sorted in place).
+    :return: the median.
+    """
+    values.sort()
+    i = len(values) // 2
+    if len(values) % 2 == 0:
+        return (values[i] + values[i - 1]) / 2
+    return values[i]
+
+def duplicate_codes(filename):
+    """
+    Finds the country codes that appear on more than one line of the data or
+    metadata file under a given filename. read_data keeps only the last line
+    of a duplicated code, so this has to look at the files themselves.
+    :param filename: the partial name of the data files being read.
+    :return: a list of QualityIssue structures.
+    """
+    issues = []
+    for suffix, column in (("_data.txt", 1), ("_metadata.txt", 0)):
+        file = open("data/" + filename + suffix, "rb")
+        file.readline()
+        seen = set()
+        for line in file:
+            code = line.split(b",", column + 1)[column].decode()
+            if code in seen:
+                issues.append(QualityIssue("duplicate" + suffix[:-4], code,
+                                           None, None))
+            seen.add(code)
+        file.close()
+    return issues
+
+def quality_scan(data, low=10.0, high=100.0, max_z=10.0, filename=None):
+    """
+    Runs every check over the countries x years matrix of a given data tuple.
+    Jumps are first differences between consecutive years; a jump is flagged
+    when its z-score against all first differences of that year is above a
+    bound. The z-score uses the median and the median absolute deviation, so
+    that one large glitch cannot hide others in the same year.
+    :param data: the data tuple being checked.
+    :param low: the lowest plausible value.
+    :param high: the highest plausible value.
+    :param max_z: the largest z-score of a first difference that is not
+                  flagged.
+    :param filename: if given, the partial name of the data files, which are
+                     also checked for duplicated codes.
+    :return: a list of QualityIssue structures, grouped by check.
+    """
+    issues = []
+    years = year_span(data)
+    codes, rows = data_matrix(data, years)
+    for i in range(len(codes)):
+        for j in range(len(years)):
+            value = rows[i][j]
+            if value is not None and (value < low or value > high):
+                issues.append(QualityIssue("range", codes[i], years[j],
+                                           value))
+    for j in range(1, len(years)):
+        jumps = []
+        for i in range(len(codes)):
+            if rows[i][j] is not None and rows[i][j - 1] is not None:
+                jumps.append((rows[i][j] - rows[i][j - 1], i))
+        if len(jumps) < 2:
+            continue
+        center = median_value([jump for jump, i in jumps])
+        deviation = 1.4826 * median_value([abs(jump - center)
+                                           for jump, i in jumps])
+        if deviation == 0:
+            continue
+        for jump, i in jumps:
+            if abs(jump - center) / deviation > max_z:
+                issues.append(QualityIssue("jump", codes[i], years[j], jump))
+    for code in data[0].country_data:
+        if code not in data[1].regions:
+            issues.append(QualityIssue("missing_metadata", code, None, None))
+    for code in data[1].regions:
+        if code not in data[0].country_data:
+            issues.append(QualityIssue("missing_data", code, None, None))
+    if filename is not None:
+        issues += duplicate_codes(filename)
+    return issues
+
+def quality_report(issues):
+    """
+    Counts the issues found by quality_scan for each check.
+    :param issues: the list returned by quality_scan.
+    :return: a dictionary mapping each check to its number of issues.
+    """
+    report = {}
+    for issue in issues:
+        report[issue.check] = report.get(issue.check, 0) + 1
+    return report
+
+def main():
+    """
+    Reads the data and metadata files, scans them, and prints the number of
+    issues for each check followed by every issue.
+    :return: None.
+    """
+    filename = "worldbank_life_expectancy"
+    data = read_data(filename)
+    issues = quality_scan(data, filename=filename)
+    report = quality_report(issues)
+    if report == {}:
+        print("No issues found")
+    for check in report:
+        print(check + ":", report[check])
+    for issue in issues:
+        print(issue.check, issue.code, issue.year, issue.value)
+
+# Run program code
+
+if __name__ == '__main__':
+    main()
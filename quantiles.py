@@ -0,0 +1,147 @@
+"""
+File: quantiles.py
+Description: Answers quantile queries (any percentile, the interquartile range)
+and percentile rank queries for the life expectancies of a group of countries
+in a particular year, using sorted per-year columns built once per data tuple.
+Name: Matt Agger
+"""
+
+# Import utils and bisect
+
+from utils import *
+
+import bisect
+
+# Define functions and procedures
+
+def quantile_index(data):
+    """
+    Builds the sorted column of life expectancies of the countries in a given
+    data tuple for every year, so that quantile queries need no further
+    sorting.
+    :param data: the data tuple being indexed (usually already filtered to a
+                 region and/or income category).
+    :return: a dictionary mapping each year to a sorted list of values.
+    """
+    index = {}
+    if data is None:
+        return index
+    for key in data[0].country_data:
+        values = data[0].country_data[key]
+        for year in values:
+            if year not in index:
+                index[year] = []
+            index[year].append(values[year])
+    for year in index:
+        index[year].sort()
+    return index
+
+def update_quantile_index(index, data, changes):
+    """
+    Brings a quantile index up to date after the data tuple it was built from
+    has been revised, re-sorting only the years that changed.
+    :param index: the dictionary returned by quantile_index.
+    :param data: the revised data tuple.
+    :param changes: the list of (country code, year) tuples returned by
+                    revise_data or append_years.
+    :pre: changes for countries that are not in the data tuple are ignored.
+    :return: None.
+    """
+    years = set()
+    for change in changes:
+        if change[0] in data[0].country_data:
+            years.add(change[1])
+    for year in years:
+        column = []
+        for key in data[0].country_data:
+            if year in data[0].country_data[key]:
+                column.append(data[0].country_data[key][year])
+        if column == []:
+            index.pop(year, None)
+        else:
+            column.sort()
+            index[year] = column
+
+def quantile_life_exp(index, year, q):
+    """
+    Computes a quantile of the life expectancies in a quantile index for a
+    specified year, interpolating linearly between the two closest values.
+    :param index: the dictionary returned by quantile_index.
+    :param year: the year being referenced.
+    :param q: the quantile being computed, between 0 and 1 (0.5 is the
+              median, 0.9 the 90th percentile).
+    :return: the quantile, or None if there is no data for the year or the
+             quantile is not between 0 and 1.
+    """
+    if year not in index or not 0 <= q <= 1:
+        return None
+    column = index[year]
+    position = (len(column) - 1) * q
+    i = int(position)
+    if i + 1 >= len(column):
+        return column[-1]
+    fraction = position - i
+    return column[i] * (1 - fraction) + column[i + 1] * fraction
+
+def iqr_life_exp(index, year):
+    """
+    Computes the interquartile range of the life expectancies in a quantile
+    index for a specified year.
+    :param index: the dictionary returned by quantile_index.
+    :param year: the year being referenced.
+    :return: the difference of the 75th and 25th percentiles, or None if there
+             is no data for the year.
+    """
+    if year not in index:
+        return None
+    return quantile_life_exp(index, year, 0.75) \
+        - quantile_life_exp(index, year, 0.25)
+
+def percentile_rank(index, data, country_code, year):
+    """
+    Computes the percentage of countries in a quantile index whose life
+    expectancy in a specified year is at most that of a given country.
+    :param index: the dictionary returned by quantile_index.
+    :param data: the data tuple the index was built from.
+    :param country_code: the code of the country being referenced.
+    :param year: the year being referenced.
+    :return: the percentile rank between 0 and 100, or None if the country has
+             no data for the year.
+    """
+    if year not in index or country_code not in data[0].country_data \
+            or year not in data[0].country_data[country_code]:
+        return None
+    column = index[year]
+    value = data[0].country_data[country_code][year]
+    return 100 * bisect.bisect_right(column, value) / len(column)
+
+def main():
+    """
+    Reads the data and metadata files; prompts the user to enter a year of
+    interest (or -1 to quit) and a region; and prints the 10th, 25th, 50th,
+    75th and 90th percentiles and the interquartile range of the life
+    expectancies in that region for that year.
+    :return: None.
+    """
+    data = read_data("worldbank_life_expectancy")
+    year = int(input("Enter year of interest (-1 to quit): "))
+    while year != -1:
+        region = input("Enter region (type 'all' to consider all): ")
+        region_fdata = filter_region(data, region)
+        if region_fdata is None:
+            print("\'" + region + "\' is not a valid region")
+        else:
+            index = quantile_index(region_fdata)
+            if year not in index:
+                print("No data for", year)
+            else:
+                for q in (0.1, 0.25, 0.5, 0.75, 0.9):
+                    print("p" + str(int(q * 100)) + ":",
+                          quantile_life_exp(index, year, q))
+                print("IQR:", iqr_life_exp(index, year))
+        year = int(input("\nEnter year of interest (-1 to quit): "))
+
+# Run program code
+
+if __name__ == '__main__':
+    main()
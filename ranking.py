@@ -2,7 +2,7 @@
 File: ranking.py
 Description: Ranks countries by their life expectancy for a particular year,
 potentially filtering the data to consider only a particular region and/or
-income category.
+income category, and computes every country's rank for every year at once.
 Name: Matt Agger
 """
 
@@ -33,6 +33,52 @@ def sorted_ranking_data(data, year):
             ranking_data.append(CountryValue(country, value))
     return sorted(ranking_data, key=country_value, reverse=True)
 
+def rank_trajectories(data):
+    """
+    Computes the rank of every country in a given data tuple for every year at
+    once, sorting each year column of the countries x years matrix. Ranks
+    match the positions in sorted_ranking_data (1 is the highest).
+    :param data: the data tuple being ranked.
+    :pre: countries that do not contain data for a year are not ranked in that
+          year.
+    :return: a dictionary mapping each country code to a dictionary of years
+             and ranks.
+    """
+    trajectories = {}
+    if data is None:
+        return trajectories
+    years = data_years(data)
+    codes, rows = data_matrix(data, years)
+    for code in codes:
+        trajectories[code] = {}
+    for j in range(len(years)):
+        column = [i for i in range(len(codes)) if rows[i][j] is not None]
+        column.sort(key=lambda i: rows[i][j], reverse=True)
+        for rank in range(len(column)):
+            trajectories[codes[column[rank]]][years[j]] = rank + 1
+    return trajectories
+
+def sorted_rank_change_data(data, trajectories, year1, year2):
+    """
+    Creates CountryValue structures for the countries in a given data tuple
+    and the number of places their rank rose between two years, appends them
+    to a list, and sorts the list in descending order (biggest climbers first,
+    biggest fallers last).
+    :param data: the data tuple the trajectories were computed from.
+    :param trajectories: the dictionary returned by rank_trajectories.
+    :param year1: the starting year being referenced.
+    :param year2: the ending year being referenced.
+    :pre: countries that are not ranked in both years are not included.
+    :return: a list of CountryValue structures, sorted in descending order.
+    """
+    change_data = []
+    for key in trajectories:
+        if year1 in trajectories[key] and year2 in trajectories[key]:
+            country = data[0].countries[key]
+            value = float(trajectories[key][year1] - trajectories[key][year2])
+            change_data.append(CountryValue(country, value))
+    return sorted(change_data, key=country_value, reverse=True)
+
 def main():
     """
     Reads the data and metadata files; prompts the user to enter a year of
@@ -0,0 +1,153 @@
+"""
+File: releases.py
+Description: Compares two releases of the same indicator, reporting the
+countries added or removed, the countries moved to another region or income
+category, and the values revised by more than a tolerance. Values are aligned
+on country code and year and compared row by row of the two countries x years
+matrices.
+Name: Matt Agger
+"""
+
+# Import utils (asyncio is imported by the functions that read releases, so
+# that comparing loaded data does not load it)
+
+from utils import *
+
+# Define structure types for Reclassification, Revision and ReleaseDiff
+
+Reclassification = struct_type("Reclassification",
+                               (str, 'code'),
+                               (str, 'field'),
+                               (str, 'old'),
+                               (str, 'new'))
+
+Revision = struct_type("Revision",
+                       (str, 'code'),
+                       (int, 'year'),
+                       ((float, NoneType), 'old'),
+                       ((float, NoneType), 'new'))
+
+ReleaseDiff = struct_type("ReleaseDiff",
+                          (list, 'added'),
+                          (list, 'removed'),
+                          (list, 'reclassified'),
+                          (list, 'revised'))
+
+# Define functions and procedures
+
+def metadata_changes(old, new, codes):
+    """
+    Finds the countries whose region or income category differs between two
+    releases.
+    :param old: the data tuple of the old release.
+    :param new: the data tuple of the new release.
+    :param codes: the codes of the countries in both releases.
+    :pre: categories are compared by name, since their codes depend on the
+          order they appear in each release.
+    :return: a list of Reclassification structures.
+    """
+    changes = []
+    for code in codes:
+        if code not in old[1].regions or code not in new[1].regions:
+            continue
+        if region_name(old, code) != region_name(new, code):
+            changes.append(Reclassification(code, "region",
+                                            region_name(old, code),
+                                            region_name(new, code)))
+        if income_name(old, code) != income_name(new, code):
+            changes.append(Reclassification(code, "income",
+                                            income_name(old, code),
+                                            income_name(new, code)))
+    return changes
+
+def diff_data(old, new, tolerance=0.0):
+    """
+    Compares two loaded releases of the same indicator.
+    :param old: the data tuple of the old release.
+    :param new: the data tuple of the new release.
+    :param tolerance: the largest change of a value that is not reported.
+    :pre: a value present in only one release is always reported as revised,
+          with None on the side it is missing from.
+    :return: a ReleaseDiff structure.
+    """
+    added = [code for code in new[0].country_data
+             if code not in old[0].country_data]
+    removed = [code for code in old[0].country_data
+               if code not in new[0].country_data]
+    years = sorted(set(data_years(old)) | set(data_years(new)))
+    codes, old_rows = data_matrix(old, years)
+    new_series = new[0].country_data
+    shared = []
+    revised = []
+    for i in range(len(codes)):
+        code = codes[i]
+        if code not in new_series:
+            continue
+        shared.append(code)
+        new_row = [new_series[code].get(year) for year in years]
+        if new_row == old_rows[i]:
+            continue
+        for j in range(len(years)):
+            old_value = old_rows[i][j]
+            new_value = new_row[j]
+            if old_value is None or new_value is None:
+                if old_value is not new_value:
+                    revised.append(Revision(code, years[j], old_value,
+                                            new_value))
+            elif abs(new_value - old_value) > tolerance:
+                revised.append(Revision(code, years[j], old_value,
+                                        new_value))
+    return ReleaseDiff(added, removed, metadata_changes(old, new, shared),
+                       revised)
+
+async def load_releases(filename1, filename2):
+    """
+    Reads two releases concurrently.
+    :param filename1: the partial name of the data files of the old release.
+    :param filename2: the partial name of the data files of the new release.
+    :return: a list of the two data tuples.
+    """
+    import asyncio
+    return await asyncio.gather(load_dataset(filename1),
+                                load_dataset(filename2))
+
+def diff_releases(filename1, filename2, tolerance=0.0):
+    """
+    Reads two releases of the same indicator and compares them.
+    :param filename1: the partial name of the data files of the old release.
+    :param filename2: the partial name of the data files of the new release.
+    :param tolerance: the largest change of a value that is not reported.
+    :return: a ReleaseDiff structure.
+    """
+    import asyncio
+    old, new = asyncio.run(load_releases(filename1, filename2))
+    return diff_data(old, new, tolerance)
+
+def main():
+    """
+    Prompts the user to enter the partial names of the data files of an old and
+    a new release (or -1 to quit) and a tolerance, and prints their
+    differences.
+    :return: None.
+    """
+    filename1 = input("Enter old release (-1 to quit): ")
+    while filename1 != "-1":
+        filename2 = input("Enter new release: ")
+        tolerance = float(input("Enter tolerance: "))
+        diff = diff_releases(filename1, filename2, tolerance)
+        print("\nAdded:", diff.added)
+        print("Removed:", diff.removed)
+        print("Reclassified:", len(diff.reclassified))
+        for change in diff.reclassified:
+            print("   ", change.code, change.field + ":", change.old, "->",
+                  change.new)
+        print("Revised values:", len(diff.revised))
+        for revision in diff.revised:
+            print("   ", revision.code, revision.year, revision.old, "->",
+                  revision.new)
+        filename1 = input("\nEnter old release (-1 to quit): ")
+
+# Run program code
+
+if __name__ == '__main__':
+    main()
@@ -58,7 +58,6 @@ for the name YOURCLASS
 
 REV = "$Revision: 3.5 $"
 
-from inspect import isclass
 from sys import stderr
 from collections import OrderedDict
 
@@ -68,7 +67,11 @@ from collections import OrderedDict
 #                                                                        #
 ##########################################################################
 
-import abc # abstract base class library
+def isclass( obj ):
+    """ Answer whether obj is a class (the same test as inspect.isclass,
+        without the cost of importing inspect).
+    """
+    return isinstance( obj, type )
 
 def makeAbstractClass( className ):
     """ Create and return an abstract class.
@@ -88,6 +91,7 @@ def makeAbstractClass( className ):
             This means that if a struct says that a slot must be
             of type Master, then an instance of C1, C2, or C2 will work.
     """
+    import abc # abstract base class library, only needed here
     class AbstractClass( metaclass=abc.ABCMeta ):
         @classmethod
         def addClasses( self, *classes ):
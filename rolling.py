@@ -0,0 +1,142 @@
+"""
+File: rolling.py
+Description: Computes rolling-window statistics (mean, growth, compound annual
+growth rate, minimum and maximum) in life expectancy for every country and
+every window of a given length at once, and ranks countries by any of them for
+a particular window.
+Name: Matt Agger
+"""
+
+# Import utils and heapq
+
+from utils import *
+
+import heapq
+
+# Define structure types for RollingStats
+
+RollingStats = struct_type("RollingStats",
+                           (str, 'country'),
+                           (int, 'year1'),
+                           (int, 'year2'),
+                           (float, 'mean'),
+                           (float, 'growth'),
+                           (float, 'cagr'),
+                           (float, 'min'),
+                           (float, 'max'))
+
+# Define functions and procedures
+
+def rolling_data(data, window):
+    """
+    Computes the rolling statistics of every window spanning a specified number
+    of years for the countries in a given data tuple. Each country's series is
+    scanned once: means come from running sums and counts, and minimums and
+    maximums from monotonic queues, so every window costs constant time.
+    :param data: the data tuple being analyzed.
+    :param window: the number of years between the first and last year of a
+                   window (5 means 1960-1965, 1961-1966, ...).
+    :pre: windows missing a value for any of their years are not included.
+    :return: a dictionary mapping the starting year of each window to a list of
+             RollingStats structures, one per country with a complete window.
+    """
+    windows = {}
+    if data is None or window < 1:
+        return windows
+    years = year_span(data)
+    codes, rows = data_matrix(data, years)
+    for j in range(len(years) - window):
+        windows[years[j]] = []
+    for i in range(len(codes)):
+        country = data[0].countries[codes[i]]
+        row = rows[i]
+        sums = [0.0]
+        counts = [0]
+        low = []
+        high = []
+        for j in range(len(row)):
+            value = row[j]
+            if value is None:
+                sums.append(sums[-1])
+                counts.append(counts[-1])
+                low = []
+                high = []
+                continue
+            sums.append(sums[-1] + value)
+            counts.append(counts[-1] + 1)
+            while low != [] and row[low[-1]] >= value:
+                low.pop()
+            low.append(j)
+            while high != [] and row[high[-1]] <= value:
+                high.pop()
+            high.append(j)
+            start = j - window
+            if start < 0 or counts[j + 1] - counts[start] != window + 1:
+                continue
+            if low[0] < start:
+                low.pop(0)
+            if high[0] < start:
+                high.pop(0)
+            first = row[start]
+            mean = (sums[j + 1] - sums[start]) / (window + 1)
+            if first > 0:
+                cagr = (value / first) ** (1 / (years[j] - years[start])) - 1
+            else:
+                cagr = 0.0
+            windows[years[start]].append(
+                RollingStats(country, years[start], years[j], mean,
+                             value - first, cagr, row[low[0]],
+                             row[high[0]]))
+    return windows
+
+def sorted_rolling_data(windows, year, stat, count=None):
+    """
+    Creates CountryValue structures for the countries in a window computed by
+    rolling_data and one of their statistics, and sorts them in descending
+    order (highest to lowest).
+    :param windows: the dictionary returned by rolling_data.
+    :param year: the starting year of the window being referenced.
+    :param stat: the name of the statistic ('mean', 'growth', 'cagr', 'min' or
+                 'max').
+    :param count: if given, only the top count countries are returned, which is
+                  cheaper than sorting the whole window.
+    :return: a list of CountryValue structures, sorted in descending order.
+    """
+    rolling_sdata = []
+    if year not in windows:
+        return rolling_sdata
+    for stats in windows[year]:
+        rolling_sdata.append(CountryValue(stats.country, getattr(stats, stat)))
+    if count is not None:
+        return heapq.nlargest(count, rolling_sdata, key=country_value)
+    return sorted(rolling_sdata, key=country_value, reverse=True)
+
+def main():
+    """
+    Reads the data and metadata files; prompts the user to enter a window
+    length in years (or -1 to quit) and a statistic; and prints the top ten
+    countries for that statistic in every window.
+    :return: None.
+    """
+    data = read_data("worldbank_life_expectancy")
+    region_fdata = filter_region(data, "all")
+    window = int(input("Enter window length in years (-1 to quit): "))
+    while window != -1:
+        stat = input("Enter statistic (mean, growth, cagr, min, max): ")
+        if stat not in ('mean', 'growth', 'cagr', 'min', 'max'):
+            print("\'" + stat + "\' is not a valid statistic")
+        else:
+            windows = rolling_data(region_fdata, window)
+            for year in windows:
+                rolling_sdata = sorted_rolling_data(windows, year, stat, 10)
+                print("\nTop 10 Life Expectancy " + stat + ":", year, "to",
+                      year + window)
+                for i in range(len(rolling_sdata)):
+                    print(str(i + 1) + ": " + rolling_sdata[i].country,
+                          rolling_sdata[i].value)
+        window = int(input("\nEnter window length in years (-1 to quit): "))
+
+# Run program code
+
+if __name__ == '__main__':
+    main()
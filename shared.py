@@ -0,0 +1,205 @@
+"""
+File: shared.py
+Description: Publishes a loaded data tuple into shared memory so that worker
+processes can attach to it read-only instead of reading the data files again
+or receiving a pickled copy. The values are stored once as a countries x years
+matrix of 64-bit floats; attached processes read them in place.
+Name: Matt Agger
+"""
+
+# Import utils, json, math, struct, sys and multiprocessing.shared_memory
+
+from utils import *
+
+import json
+import math
+import struct as binary
+import sys
+from collections.abc import Mapping
+from multiprocessing import shared_memory
+
+# Names of the blocks published by this process, which stay registered with its
+# resource tracker when this process attaches to them
+
+_published = set()
+
+# Define classes
+
+class SharedSeries(Mapping):
+    """
+    A read-only dictionary of years and values for one country, backed by its
+    row of a shared matrix. Missing years are stored as NaN and skipped.
+    Iteration is always in chronological order.
+    """
+    __slots__ = ('matrix', 'start', 'years', 'first', 'size')
+
+    def __init__(self, matrix, start, years):
+        """
+        Creates a view of one row of a shared matrix.
+        :param matrix: the matrix, as a memoryview of 64-bit floats.
+        :param start: the position of the row's first value in the matrix.
+        :param years: the years of the matrix columns (consecutive).
+        """
+        self.matrix = matrix
+        self.start = start
+        self.years = years
+        self.first = years[0] if years != [] else 0
+        self.size = None
+
+    def _index(self, year):
+        """
+        Returns the column of a year that has a value.
+        :param year: the year being referenced.
+        :return: the column, or None if the year has no value.
+        """
+        j = year - self.first if isinstance(year, int) else -1
+        if 0 <= j < len(self.years) \
+                and not math.isnan(self.matrix[self.start + j]):
+            return j
+        return None
+
+    def __contains__(self, year):
+        """
+        Returns whether a year has a value.
+        :param year: the year being checked.
+        :return: True if the year has a value, otherwise False.
+        """
+        return self._index(year) is not None
+
+    def __getitem__(self, year):
+        """
+        Returns the value of a year, read from the shared block.
+        :param year: the year being referenced.
+        :pre: raises KeyError if the year has no value.
+        :return: the value.
+        """
+        j = self._index(year)
+        if j is None:
+            raise KeyError(year)
+        return self.matrix[self.start + j]
+
+    def __iter__(self):
+        """
+        Iterates over the years that have a value.
+        :return: an iterator of years, in ascending order.
+        """
+        for j in range(len(self.years)):
+            if not math.isnan(self.matrix[self.start + j]):
+                yield self.first + j
+
+    def __len__(self):
+        """
+        Returns the number of years that have a value, counting them the first
+        time it is called.
+        :return: the number of years.
+        """
+        if self.size is None:
+            self.size = sum(1 for year in self)
+        return self.size
+
+    def __repr__(self):
+        """
+        Returns a printable representation of the series.
+        :return: the series as a dictionary wrapped in SharedSeries().
+        """
+        return "SharedSeries(" + repr(dict(self)) + ")"
+
+# Define functions and procedures
+
+def publish_data(data, name=None):
+    """
+    Copies a given data tuple into a new block of shared memory. The block
+    holds a header with the country codes, names, category codes and category
+    names, followed by the matrix of values.
+    :param data: the data tuple being published.
+    :param name: the name of the block (a unique name is chosen if None).
+    :pre: the publishing process owns the block and must close and unlink it
+          once the workers are done.
+    :return: the SharedMemory object, whose name attaches to the data.
+    """
+    years = year_span(data)
+    codes, rows = data_matrix(data, years)
+    header = {
+        'codes': codes,
+        'countries': [data[0].countries[code] for code in codes],
+        'years': years,
+        'regions': [data[1].regions[code] for code in codes],
+        'incomes': [data[1].incomes[code] for code in codes],
+        'special_notes': [data[1].special_notes[code] for code in codes],
+        'num_entities': data[1].num_entities,
+        'num_countries': data[1].num_countries,
+        'metadata_file': data[1].metadata_file,
+        'region_names': data[1].region_names,
+        'income_names': data[1].income_names
+    }
+    text = json.dumps(header).encode()
+    offset = (8 + len(text) + 7) // 8 * 8
+    size = offset + 8 * len(codes) * len(years)
+    shm = shared_memory.SharedMemory(name, create=True, size=max(size, 1))
+    _published.add(shm.name)
+    binary.pack_into("<q", shm.buf, 0, len(text))
+    shm.buf[8:8 + len(text)] = text
+    matrix = shm.buf[offset:size].cast('d')
+    i = 0
+    for row in rows:
+        for value in row:
+            matrix[i] = math.nan if value is None else value
+            i += 1
+    matrix.release()
+    return shm
+
+def attach_block(name):
+    """
+    Opens an existing block of shared memory without leaving it registered
+    with this process's resource tracker, which would otherwise unlink the
+    publisher's block when this process exits.
+    :param name: the name of the shared memory block.
+    :pre: blocks published by this process keep their registration, so that
+          unlinking them does not make the tracker complain.
+    :return: the SharedMemory object.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+    from multiprocessing import resource_tracker
+    shm = shared_memory.SharedMemory(name)
+    if shm.name not in _published:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+def attach_data(name):
+    """
+    Attaches to a data tuple published by publish_data without copying its
+    values.
+    :param name: the name of the shared memory block.
+    :pre: the country data of the returned tuple is read-only; the caller must
+          drop the data tuple before closing the SharedMemory object, and must
+          not unlink it (the block stays owned by the publishing process).
+    :return: a tuple containing the data tuple and the SharedMemory object.
+    """
+    shm = attach_block(name)
+    length = binary.unpack_from("<q", shm.buf, 0)[0]
+    header = json.loads(bytes(shm.buf[8:8 + length]).decode())
+    offset = (8 + length + 7) // 8 * 8
+    codes = header['codes']
+    years = header['years']
+    matrix = shm.buf[offset:offset + 8 * len(codes) * len(years)].cast('d')
+    countries = {}
+    country_data = {}
+    regions = {}
+    incomes = {}
+    special_notes = {}
+    for i in range(len(codes)):
+        code = codes[i]
+        countries[code] = header['countries'][i]
+        country_data[code] = SharedSeries(matrix, i * len(years), years)
+        regions[code] = header['regions'][i]
+        incomes[code] = header['incomes'][i]
+        special_notes[code] = tuple(header['special_notes'][i])
+    countryData = CountryData(countries, country_data)
+    countryMetadata = CountryMetadata(regions, incomes, special_notes,
+                                      header['num_entities'],
+                                      header['num_countries'],
+                                      header['metadata_file'],
+                                      header['region_names'],
+                                      header['income_names'])
+    return ((countryData, countryMetadata), shm)
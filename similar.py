@@ -0,0 +1,165 @@
+"""
+File: similar.py
+Description: Finds the countries whose life expectancy trajectories most
+resemble that of a given country, comparing normalized series by Euclidean or
+correlation distance over the years both countries have data for.
+Name: Matt Agger
+"""
+
+# Import utils, math and heapq
+
+from utils import *
+
+import math
+import heapq
+
+# Fewest years two series must share for their distance to be computed
+
+MIN_OVERLAP = 10
+
+# Define functions and procedures
+
+def normalized_series(data):
+    """
+    Lays the series of the countries in a given data tuple out as rows of the
+    countries x years matrix, each standardized to a mean of 0 and a standard
+    deviation of 1 so that trajectories are compared by shape, not level.
+    :param data: the data tuple being normalized.
+    :pre: missing years stay None; a country with fewer than two values, or
+          with a constant series, has a row of None.
+    :return: a tuple containing the list of country codes and the list of
+             normalized rows in the same order.
+    """
+    codes, rows = data_matrix(data, data_years(data))
+    for row in rows:
+        present = [value for value in row if value is not None]
+        if len(present) < 2:
+            row[:] = [None] * len(row)
+            continue
+        mean = sum(present) / len(present)
+        deviation = math.sqrt(sum((value - mean) ** 2 for value in present)
+                              / len(present))
+        for j in range(len(row)):
+            if row[j] is not None:
+                if deviation == 0:
+                    row[j] = None
+                else:
+                    row[j] = (row[j] - mean) / deviation
+    return (codes, rows)
+
+def series_distance(row1, row2, method="euclidean"):
+    """
+    Computes the distance between two normalized rows over the years both have
+    a value for.
+    :param row1: the first normalized row.
+    :param row2: the second normalized row.
+    :param method: 'euclidean' (root mean squared difference) or 'correlation'
+                   (1 minus the Pearson correlation).
+    :return: the distance, or None if the rows share fewer than MIN_OVERLAP
+             years or the method is not valid.
+    """
+    if method not in ("euclidean", "correlation"):
+        return None
+    pairs = [(a, b) for a, b in zip(row1, row2)
+             if a is not None and b is not None]
+    if len(pairs) < MIN_OVERLAP:
+        return None
+    if method == "euclidean":
+        return math.sqrt(sum((a - b) ** 2 for a, b in pairs) / len(pairs))
+    mean1 = sum(a for a, b in pairs) / len(pairs)
+    mean2 = sum(b for a, b in pairs) / len(pairs)
+    covariance = sum((a - mean1) * (b - mean2) for a, b in pairs)
+    variance1 = sum((a - mean1) ** 2 for a, b in pairs)
+    variance2 = sum((b - mean2) ** 2 for a, b in pairs)
+    if variance1 == 0 or variance2 == 0:
+        return None
+    return 1 - covariance / math.sqrt(variance1 * variance2)
+
+def distance_matrix(data, method="euclidean"):
+    """
+    Precomputes the distance between every pair of countries in a given data
+    tuple, for repeated similarity queries.
+    :param data: the data tuple being compared.
+    :param method: 'euclidean' or 'correlation' (see series_distance).
+    :return: a dictionary mapping each country code to a dictionary of the
+             other country codes and their distances (pairs without a distance
+             are left out), or None if the method is not valid.
+    """
+    if method not in ("euclidean", "correlation"):
+        return None
+    codes, rows = normalized_series(data)
+    distances = {}
+    for code in codes:
+        distances[code] = {}
+    for i in range(len(codes)):
+        for j in range(i + 1, len(codes)):
+            distance = series_distance(rows[i], rows[j], method)
+            if distance is not None:
+                distances[codes[i]][codes[j]] = distance
+                distances[codes[j]][codes[i]] = distance
+    return distances
+
+def similar_countries(data, country_code, count=10, method="euclidean",
+                      distances=None):
+    """
+    Creates CountryValue structures for the countries in a given data tuple
+    whose trajectories are closest to that of a specified country, holding
+    their distance, and sorts them in ascending order (most similar first).
+    :param data: the data tuple being searched.
+    :param country_code: the code of the country being compared to.
+    :param count: the number of neighbours being returned.
+    :param method: 'euclidean' or 'correlation' (see series_distance).
+    :param distances: if given, the dictionary returned by distance_matrix for
+                      this data tuple and method, which turns the query into a
+                      lookup.
+    :return: a list of CountryValue structures, sorted in ascending order, or
+             None if the country is not in the data tuple or the method is not
+             valid.
+    """
+    if country_code not in data[0].country_data \
+            or method not in ("euclidean", "correlation"):
+        return None
+    if distances is None:
+        codes, rows = normalized_series(data)
+        target = rows[codes.index(country_code)]
+        row_distances = {}
+        for i in range(len(codes)):
+            if codes[i] != country_code:
+                distance = series_distance(target, rows[i], method)
+                if distance is not None:
+                    row_distances[codes[i]] = distance
+    else:
+        row_distances = distances[country_code]
+    similar_data = []
+    for code in row_distances:
+        similar_data.append(CountryValue(data[0].countries[code],
+                                         row_distances[code]))
+    return heapq.nsmallest(count, similar_data, key=country_value)
+
+def main():
+    """
+    Reads the data and metadata files; prompts the user to enter a country
+    code (or enter to quit); and prints the ten countries whose life
+    expectancy trajectories most resemble it.
+    :return: None.
+    """
+    data = filter_region(read_data("worldbank_life_expectancy"), "all")
+    distances = distance_matrix(data)
+    country = input("Enter country code (Enter to quit): ")
+    while country != "":
+        similar_data = similar_countries(data, country, 10,
+                                         distances=distances)
+        if similar_data is None:
+            print("\'" + country + "\' is not a valid country code")
+        else:
+            print("\nTrajectories most like " + data[0].countries[country]
+                  + ":")
+            for i in range(len(similar_data)):
+                print(str(i + 1) + ": " + similar_data[i].country,
+                      similar_data[i].value)
+        country = input("\nEnter country code (Enter to quit): ")
+
+# Run program code
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""
+File: sketch.py
+Description: Provides mergeable quantile sketches (in the style of the KLL
+sketch) that summarize the life expectancies of a group of countries in a
+particular year in bounded memory, so that medians and other percentiles can
+be computed for panels too large to sort in memory. Sketches can be built
+while streaming the data file, and sketches built from separate chunks or by
+separate worker processes can be merged.
+
+Error bound: a quantile answered by an approximate sketch with parameter k is
+the value at a rank within about 1.7 / k of the requested one (about 1% of
+the group for the default k of 200). Sketches built in exact mode keep every
+value and answer like quantiles.quantile_life_exp.
+Name: Matt Agger
+"""
+
+# Import utils and cube
+
+from utils import *
+from cube import cube_groups, group_names
+
+# Define structure types for QuantileSketch
+
+QuantileSketch = struct_type("QuantileSketch",
+                             (int, 'k'),
+                             (bool, 'exact'),
+                             (list, 'compactors'),
+                             (int, 'count'),
+                             (int, 'size'),
+                             (int, 'limit'),
+                             (int, 'coin'))
+
+# Sketches are updated once per value, so skip the type checks on assignment
+
+QuantileSketch.__setattr__ = object.__setattr__
+
+# Define functions and procedures
+
+def new_sketch(k=200, exact=False):
+    """
+    Creates an empty quantile sketch.
+    :param k: the accuracy parameter (larger is more accurate and larger).
+    :param exact: if True, every value is kept and quantiles are exact.
+    :return: a QuantileSketch structure.
+    """
+    sketch = QuantileSketch(k, exact, [[]], 0, 0, 0, 0)
+    sketch.limit = capacity(sketch, 0)
+    return sketch
+
+def capacity(sketch, level):
+    """
+    Returns how many values a level of a sketch holds before it is compacted.
+    Lower levels hold fewer values, shrinking by 2/3 per level below the top.
+    :param sketch: the QuantileSketch structure being referenced.
+    :param level: the level being referenced (values at level h stand for
+                  2 ** h values each).
+    :return: the capacity of the level.
+    """
+    height = len(sketch.compactors) - level - 1
+    return max(2, int(sketch.k * (2 / 3) ** height) + 1)
+
+def compress(sketch):
+    """
+    Compacts the levels of a sketch until it holds fewer values than the total
+    capacity of its levels.
+    Compacting a level sorts it and moves every other value (starting at an
+    alternating offset) up one level, where it counts twice.
+    :param sketch: the QuantileSketch structure being compressed.
+    :return: None.
+    """
+    if sketch.exact:
+        return
+    while sketch.size >= sketch.limit:
+        for h in range(len(sketch.compactors)):
+            level = sketch.compactors[h]
+            if len(level) >= capacity(sketch, h):
+                if h + 1 == len(sketch.compactors):
+                    sketch.compactors.append([])
+                    sketch.limit = sum(capacity(sketch, h)
+                                       for h in range(len(sketch.compactors)))
+                level.sort()
+                kept = level.pop() if len(level) % 2 == 1 else None
+                moved = level[sketch.coin::2]
+                sketch.compactors[h + 1].extend(moved)
+                sketch.coin = 1 - sketch.coin
+                sketch.size -= len(level) - len(moved)
+                level.clear()
+                if kept is not None:
+                    level.append(kept)
+                break
+
+def sketch_add(sketch, value):
+    """
+    Adds a value to a sketch.
+    :param sketch: the QuantileSketch structure being updated.
+    :param value: the value being added.
+    :return: None.
+    """
+    sketch.compactors[0].append(value)
+    sketch.count += 1
+    sketch.size += 1
+    if sketch.size >= sketch.limit:
+        compress(sketch)
+
+def sketch_merge(sketch, other):
+    """
+    Merges a sketch into another one, as if the second sketch's values had
+    been added to the first.
+    :param sketch: the QuantileSketch structure being updated.
+    :param other: the QuantileSketch structure being merged into it.
+    :pre: the merged sketch is exact only if both sketches were.
+    :return: None.
+    """
+    sketch.exact = sketch.exact and other.exact
+    while len(sketch.compactors) < len(other.compactors):
+        sketch.compactors.append([])
+    sketch.limit = sum(capacity(sketch, h)
+                       for h in range(len(sketch.compactors)))
+    for h in range(len(other.compactors)):
+        sketch.compactors[h].extend(other.compactors[h])
+    sketch.count += other.count
+    sketch.size += other.size
+    compress(sketch)
+
+def sketch_quantile(sketch, q):
+    """
+    Computes a quantile of the values added to a sketch.
+    :param sketch: the QuantileSketch structure being referenced.
+    :param q: the quantile being computed, between 0 and 1 (0.5 is the
+              median).
+    :pre: exact sketches interpolate linearly between the two closest values;
+          approximate sketches return the stored value at the requested rank.
+    :return: the quantile, or None if the sketch is empty or the quantile is
+             not between 0 and 1.
+    """
+    if sketch.count == 0 or not 0 <= q <= 1:
+        return None
+    if sketch.exact:
+        values = sorted(sketch.compactors[0])
+        position = (len(values) - 1) * q
+        i = int(position)
+        if i + 1 >= len(values):
+            return values[-1]
+        fraction = position - i
+        return values[i] * (1 - fraction) + values[i + 1] * fraction
+    weighted = []
+    for h in range(len(sketch.compactors)):
+        for value in sketch.compactors[h]:
+            weighted.append((value, 2 ** h))
+    weighted.sort()
+    total = sum(weight for value, weight in weighted)
+    rank = q * total
+    seen = 0
+    for value, weight in weighted:
+        seen += weight
+        if seen >= rank:
+            return value
+    return weighted[-1][0]
+
+def sketch_groups(filename, k=200, exact=False):
+    """
+    Builds a sketch for every group of the cube (see cube.cube_groups) and
+    every year while streaming the data file under a given filename, so that
+    only the metadata and the sketches are held in memory.
+    :param filename: the partial name of the data files being read.
+    :param k: the accuracy parameter of the sketches.
+    :param exact: if True, the sketches keep every value.
+    :return: a dictionary mapping (region, income category, year) tuples to
+             QuantileSketch structures, where a region or income category of
+             None means all of them.
+    """
+    metadata = read_metadata(filename)
+    sketches = {}
+    for country_code, country_name, data in data_rows(filename):
+        if country_code not in metadata.regions:
+            continue
+        groups = cube_groups(metadata, country_code)
+        for year in data:
+            for group in groups:
+                bucket = group_names(metadata, (group[0], group[1], year))
+                if bucket not in sketches:
+                    sketches[bucket] = new_sketch(k, exact)
+                sketch_add(sketches[bucket], data[year])
+    return sketches
+
+def merge_groups(sketches, other):
+    """
+    Merges the sketches built from one chunk of data (or by one worker
+    process) into those built from another.
+    :param sketches: the dictionary of sketches being updated.
+    :param other: the dictionary of sketches being merged into it.
+    :return: None.
+    """
+    for bucket in other:
+        if bucket not in sketches:
+            sketches[bucket] = new_sketch(other[bucket].k,
+                                          other[bucket].exact)
+        sketch_merge(sketches[bucket], other[bucket])
+
+def main():
+    """
+    Streams the data file into sketches and prints the median life expectancy
+    of every region for a year entered by the user (or -1 to quit).
+    :return: None.
+    """
+    filename = "worldbank_life_expectancy"
+    sketches = sketch_groups(filename)
+    metadata = read_metadata(filename)
+    year = int(input("Enter year of interest (-1 to quit): "))
+    while year != -1:
+        for region in metadata.region_names:
+            if (region, None, year) in sketches:
+                print(region + ":",
+                      sketch_quantile(sketches[(region, None, year)], 0.5))
+        year = int(input("\nEnter year of interest (-1 to quit): "))
+
+# Run program code
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""
+File: stability.py
+Description: Measures how stable the ranking of countries by life expectancy
+is over time, computing the Spearman or Kendall rank correlation between every
+pair of years, potentially filtering the data to consider only a particular
+region and/or income category. Kendall's tau is counted by merge sort, in
+O(n log n) per pair of years.
+Name: Matt Agger
+"""
+
+# Import utils and math
+
+from utils import *
+
+import math
+
+# Define functions and procedures
+
+def average_ranks(values):
+    """
+    Ranks a list of numbers from lowest (1) to highest, giving tied numbers the
+    average of the ranks they span.
+    :param values: the list of numbers being ranked.
+    :return: the list of ranks, in the same order as the numbers.
+    """
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    start = 0
+    while start < len(order):
+        end = start
+        while end + 1 < len(order) \
+                and values[order[end + 1]] == values[order[start]]:
+            end += 1
+        for k in range(start, end + 1):
+            ranks[order[k]] = (start + end) / 2 + 1
+        start = end + 1
+    return ranks
+
+def pearson(values1, values2):
+    """
+    Computes the Pearson correlation of two lists of numbers.
+    :param values1: the first list of numbers.
+    :param values2: the second list of numbers, in the same order.
+    :return: the correlation, or None if either list is constant.
+    """
+    mean1 = sum(values1) / len(values1)
+    mean2 = sum(values2) / len(values2)
+    covariance = 0.0
+    variance1 = 0.0
+    variance2 = 0.0
+    for a, b in zip(values1, values2):
+        covariance += (a - mean1) * (b - mean2)
+        variance1 += (a - mean1) ** 2
+        variance2 += (b - mean2) ** 2
+    if variance1 == 0 or variance2 == 0:
+        return None
+    return covariance / math.sqrt(variance1 * variance2)
+
+def tied_pairs(values):
+    """
+    Counts the pairs of equal numbers in a sorted list.
+    :param values: the sorted list of numbers (or tuples).
+    :return: the number of tied pairs.
+    """
+    ties = 0
+    run = 1
+    for k in range(1, len(values) + 1):
+        if k < len(values) and values[k] == values[k - 1]:
+            run += 1
+        else:
+            ties += run * (run - 1) // 2
+            run = 1
+    return ties
+
+def merge_swaps(values):
+    """
+    Sorts a list of numbers in place by merge sort and counts the swaps a
+    bubble sort would have made (the number of pairs out of order).
+    :param values: the list of numbers being sorted.
+    :return: the number of pairs out of order.
+    """
+    swaps = 0
+    width = 1
+    buffer = values[:]
+    while width < len(values):
+        for start in range(0, len(values), width * 2):
+            middle = min(start + width, len(values))
+            end = min(start + width * 2, len(values))
+            i = start
+            j = middle
+            k = start
+            while i < middle and j < end:
+                if values[j] < values[i]:
+                    buffer[k] = values[j]
+                    swaps += middle - i
+                    j += 1
+                else:
+                    buffer[k] = values[i]
+                    i += 1
+                k += 1
+            buffer[k:end] = values[i:middle] + values[j:end]
+        values[:] = buffer
+        width *= 2
+    return swaps
+
+def kendall_tau(values1, values2):
+    """
+    Computes Kendall's tau-b of two lists of numbers (Knight's algorithm):
+    the pairs are sorted by the first list, and the discordant pairs are
+    counted as the swaps needed to merge sort the second list.
+    :param values1: the first list of numbers.
+    :param values2: the second list of numbers, in the same order.
+    :return: the correlation, or None if either list is constant.
+    """
+    pairs = sorted(zip(values1, values2))
+    n = len(pairs)
+    total = n * (n - 1) // 2
+    ties1 = tied_pairs([a for a, b in pairs])
+    joint_ties = tied_pairs(pairs)
+    second = [b for a, b in pairs]
+    swaps = merge_swaps(second)
+    ties2 = tied_pairs(second)
+    if total == ties1 or total == ties2:
+        return None
+    concordance = total - ties1 - ties2 + joint_ties - 2 * swaps
+    return concordance / math.sqrt((total - ties1) * (total - ties2))
+
+def rank_correlation_matrix(data, method="spearman"):
+    """
+    Computes the rank correlation of the countries in a given data tuple
+    between every pair of years.
+    Every year column is ranked once; the ranks are reused for a pair of years
+    whose countries are the same, and only the countries both years share are
+    re-ranked otherwise.
+    :param data: the data tuple being analyzed (possibly filtered).
+    :param method: 'spearman' or 'kendall'.
+    :pre: a correlation is only computed over the countries with data in both
+          years, and is None if there are fewer than two of them or either
+          year's values are all equal.
+    :return: a tuple containing the list of years and the years x years matrix
+             of correlations as a list of rows, or None if the method is not
+             valid.
+    """
+    if method not in ("spearman", "kendall"):
+        return None
+    years = data_years(data)
+    codes, rows = data_matrix(data, years)
+    columns = []
+    present = []
+    ranks = []
+    for j in range(len(years)):
+        found = [i for i in range(len(codes)) if rows[i][j] is not None]
+        present.append(found)
+        columns.append([rows[i][j] for i in found])
+        ranks.append(average_ranks(columns[j]))
+    matrix = [[None] * len(years) for j in range(len(years))]
+    for j1 in range(len(years)):
+        for j2 in range(j1, len(years)):
+            if present[j1] == present[j2]:
+                values1 = columns[j1]
+                values2 = columns[j2]
+                ranks1 = ranks[j1]
+                ranks2 = ranks[j2]
+            else:
+                shared = [i for i in present[j1]
+                          if rows[i][j2] is not None]
+                values1 = [rows[i][j1] for i in shared]
+                values2 = [rows[i][j2] for i in shared]
+                ranks1 = None
+            if len(values1) < 2:
+                continue
+            if method == "kendall":
+                correlation = kendall_tau(values1, values2)
+            else:
+                if ranks1 is None:
+                    ranks1 = average_ranks(values1)
+                    ranks2 = average_ranks(values2)
+                correlation = pearson(ranks1, ranks2)
+            matrix[j1][j2] = correlation
+            matrix[j2][j1] = correlation
+    return (years, matrix)
+
+def main():
+    """
+    Reads the data and metadata files; prompts the user to enter a method
+    (spearman or kendall, or -1 to quit), a region, and an income category;
+    prints the rank correlation of every year with the year ten years later in
+    the filtered data; and repeats the process again.
+    :return: None.
+    """
+    data = read_data("worldbank_life_expectancy")
+    method = input("Enter method (spearman or kendall, -1 to quit): ")
+    while method != "-1":
+        region = input("Enter region (type 'all' to consider all): ")
+        region_fdata = filter_region(data, region)
+        if region_fdata is None:
+            print("\'" + region + "\' is not a valid region")
+        else:
+            income = input("Enter income category "
+                           "(type 'all' to consider all): ")
+            income_fdata = filter_income(region_fdata, income)
+            if income_fdata is None:
+                print("\'" + income + "\' is not a valid income category")
+            else:
+                correlations = rank_correlation_matrix(income_fdata, method)
+                if correlations is None:
+                    print("\'" + method + "\' is not a valid method")
+                else:
+                    years, matrix = correlations
+                    for j in range(len(years) - 10):
+                        print(str(years[j]) + "-" + str(years[j + 10]) + ":",
+                              matrix[j][j + 10])
+        method = input("\nEnter method (spearman or kendall, -1 to quit): ")
+
+# Run program code
+
+if __name__ == '__main__':
+    main()
@@ -15,10 +15,35 @@ Author: CS @ RIT
 File:  test_overall.py
 """
 
+import asyncio
 import utils
 import ranking
 import growth
 import drop
+import rolling
+import quantiles
+import compact
+import similar
+import shared
+import benchmark
+import cube
+import quality
+import sketch
+import harness
+import trend
+import events
+import extremes
+import bootstrap
+import stability
+import dispersion
+import releases
+import catalog
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import statistics
 
 
 def test_ranking(data):
@@ -97,6 +122,35 @@ def test_ranking(data):
         print("Testing:", test_str, "->", eval(test_str))
 
 
+def test_rank_trajectories(data):
+    """
+    Function to test rank trajectory functionality against the
+    ranking functionality it generalizes.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Filtering for region Middle East & North Africa...", end="")
+    fdata = utils.filter_region(data, "Middle East & North Africa")
+    print("complete.")
+    print("Computing rank trajectories...", end="")
+    trajectories = ranking.rank_trajectories(fdata)
+    print("complete.")
+    sorted_data = ranking.sorted_rank_change_data(fdata, trajectories,
+                                                  1960, 2015)
+
+    test_strings = list()
+    test_strings.append("trajectories['ISR'][1977] == 1")
+    test_strings.append("len(trajectories['ISR']) == 52")
+    test_strings.append("trajectories['QAT'][1965] == 2")
+    test_strings.append("len(sorted_data) == 19")
+    test_strings.append("sorted_data[0].country == 'Oman'")
+    test_strings.append("sorted_data[0].value == 10")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
 def test_growth(data):
     """
         Function to test growth functionality.  Also implicitly
@@ -246,6 +300,972 @@ def test_drop(data):
         print("Testing:", test_str, "->", eval(test_str))
 
 
+def test_special_note(data):
+    """
+    Function to test lazily loaded special notes.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Filtering for region South Asia...", end="")
+    fdata = utils.filter_region(data, "South Asia")
+    print("complete.")
+    print("Replacing a metadata file after reading its notes...", end="")
+    cwd = os.getcwd()
+    folder = tempfile.mkdtemp()
+    os.mkdir(os.path.join(folder, "data"))
+    shutil.copy("data/worldbank_life_expectancy_data.txt",
+                os.path.join(folder, "data", "x_data.txt"))
+    metadata = open("data/worldbank_life_expectancy_metadata.txt",
+                    newline="").read()
+    os.chdir(folder)
+    file = open("data/x_metadata.txt", "w", newline="")
+    file.write(metadata)
+    file.close()
+    old_note = utils.special_note(utils.read_data("x"), 'AFG')
+    file = open("data/x_metadata.txt.new", "w", newline="")
+    file.write(metadata.replace("Fiscal year end", "Revised: fiscal year end"))
+    file.close()
+    os.replace("data/x_metadata.txt.new", "data/x_metadata.txt")
+    new_data = utils.read_data("x")
+    new_note = utils.special_note(new_data, 'AFG')
+    new_blank = utils.special_note(new_data, 'AGO')
+    os.chdir(cwd)
+    moved_note = utils.special_note(new_data, 'AFG')
+    shutil.rmtree(folder)
+    print("complete.")
+
+    test_strings = list()
+    test_strings.append("utils.special_note(fdata, 'AFG').startswith("
+                        "'Fiscal year end: March 20;')")
+    test_strings.append("utils.special_note(data, 'AGO') == ''")
+    test_strings.append("utils.special_note(fdata, 'ABW') is None")
+    test_strings.append("old_note.startswith('Fiscal year end')")
+    test_strings.append("new_note.startswith('Revised: fiscal year end')")
+    test_strings.append("new_blank == ''")
+    test_strings.append("moved_note == new_note")
+    test_strings.append("len(utils._note_maps) <= utils.MAX_NOTE_MAPS")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_shared(data):
+    """
+    Function to test publishing data into shared memory and
+    attaching to it.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Publishing data into shared memory...", end="")
+    shm = shared.publish_data(data)
+    print("complete.")
+    print("Attaching to shared data...", end="")
+    sdata, sshm = shared.attach_data(shm.name)
+    print("complete.")
+    fdata = utils.filter_region(data, "Middle East & North Africa")
+    sfdata = utils.filter_region(sdata, "Middle East & North Africa")
+    sorted_data = ranking.sorted_ranking_data(sfdata, 1977)
+    drop_data = drop.sorted_drop_data(sfdata)
+    years = list(sdata[0].country_data['BMU'])
+    region = utils.region_name(sdata, 'AFG')
+    del sdata, sfdata
+    print("Attaching to shared data from another process...", end="")
+    worker = subprocess.run([sys.executable, "-c",
+                             "import shared, ranking\n"
+                             "sdata, sshm = shared.attach_data("
+                             + repr(shm.name) + ")\n"
+                             "print(ranking.sorted_ranking_data(sdata, 1977)"
+                             "[0].country)\n"
+                             "del sdata\n"
+                             "sshm.close()"],
+                            capture_output=True, text=True)
+    rdata, rshm = shared.attach_data(shm.name)
+    reattached = len(rdata[0].country_data)
+    del rdata
+    rshm.close()
+    print("complete.")
+
+    test_strings = list()
+    test_strings.append("sorted_data == "
+                        "ranking.sorted_ranking_data(fdata, 1977)")
+    test_strings.append("drop_data == drop.sorted_drop_data(fdata)")
+    test_strings.append("years == list(data[0].country_data['BMU'])")
+    test_strings.append("region == 'South Asia'")
+    test_strings.append("worker.stdout.strip() == "
+                        "ranking.sorted_ranking_data(data, 1977)[0].country")
+    test_strings.append("worker.stderr == ''")
+    test_strings.append("reattached == len(data[0].country_data)")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+    sshm.close()
+    shm.close()
+    shm.unlink()
+
+
+def test_similar(data):
+    """
+    Function to test similar trajectory search.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Filtering for all regions...", end="")
+    fdata = utils.filter_region(data, "all")
+    print("complete.")
+    print("Searching for trajectories like Rwanda...", end="")
+    similar_data = similar.similar_countries(fdata, "RWA", 5)
+    print("complete.")
+    print("Computing distance matrix...", end="")
+    distances = similar.distance_matrix(fdata)
+    print("complete.")
+
+    test_strings = list()
+    test_strings.append("len(similar_data) == 5")
+    test_strings.append("similar_data[0].country == 'Uganda'")
+    test_strings.append("similar.similar_countries(fdata, 'RWA', 5, "
+                        "distances=distances) == similar_data")
+    test_strings.append("similar.similar_countries(fdata, 'RWA', 3, "
+                        "'correlation')[2].country == 'Uganda'")
+    test_strings.append("similar.similar_countries(fdata, 'WLD') is None")
+    test_strings.append("similar.similar_countries(fdata, 'RWA', 5, "
+                        "'bogus') is None")
+    test_strings.append("similar.distance_matrix(fdata, 'bogus') is None")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_compact(data):
+    """
+    Function to test the compact storage mode against the default
+    one, within its precision contract.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Reading data files into compact storage...", end="")
+    cdata = compact.read_compact_data("worldbank_life_expectancy")
+    print("complete.")
+    print("Filtering for region Middle East & North Africa...", end="")
+    fdata = utils.filter_region(data, "Middle East & North Africa")
+    cfdata = utils.filter_region(cdata, "Middle East & North Africa")
+    print("complete.")
+    sorted_data = ranking.sorted_ranking_data(fdata, 1977)
+    csorted_data = ranking.sorted_ranking_data(cfdata, 1977)
+
+    test_strings = list()
+    test_strings.append("len(csorted_data) == 20")
+    test_strings.append("csorted_data[0].country == 'Israel'")
+    test_strings.append("abs(csorted_data[6].value - 66.454) "
+                        "<= 66.454 / 2 ** 24")
+    test_strings.append("list(cdata[0].country_data['BMU']) == "
+                        "list(data[0].country_data['BMU'])")
+    test_strings.append("drop.sorted_drop_data(cfdata)[0].country == "
+                        "drop.sorted_drop_data(fdata)[0].country")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_categories(data):
+    """
+    Function to test the encoding of regions and income categories.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Filtering for region South Asia...", end="")
+    fdata = utils.filter_region(data, "South Asia")
+    print("complete.")
+
+    test_strings = list()
+    test_strings.append("fdata[1].region_names is data[1].region_names")
+    test_strings.append("utils.region_name(fdata, 'AFG') == 'South Asia'")
+    test_strings.append("utils.income_name(fdata, 'AFG') == 'Low income'")
+    test_strings.append("utils.region_name(data, 'WLD') == ''")
+    test_strings.append("utils.category_code(data[1].income_names, "
+                        "'Middle income') is None")
+    test_strings.append("utils.filter_income(fdata, 'Middle income') is None")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_quantiles(data):
+    """
+    Function to test quantile functionality.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Filtering for region South Asia...", end="")
+    fdata = utils.filter_region(data, "South Asia")
+    print("complete.")
+    print("Building quantile index...", end="")
+    index = quantiles.quantile_index(fdata)
+    print("complete.")
+    sorted_data = ranking.sorted_ranking_data(fdata, 2010)
+
+    test_strings = list()
+    test_strings.append("len(index) == 56")
+    test_strings.append("quantiles.quantile_life_exp(index, 2010, 0.5) == "
+                        "(sorted_data[3].value + sorted_data[4].value) / 2")
+    test_strings.append("quantiles.quantile_life_exp(index, 2010, 1) == "
+                        "sorted_data[0].value")
+    test_strings.append("quantiles.percentile_rank(index, fdata, 'AFG', "
+                        "2010) == 12.5")
+    test_strings.append("quantiles.iqr_life_exp(index, 2016) is None")
+    test_strings.append("quantiles.quantile_life_exp(index, 2010, -0.5) "
+                        "is None")
+    test_strings.append("quantiles.quantile_life_exp(index, 2010, 1.5) "
+                        "is None")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_fill_gaps(data):
+    """
+    Function to test gap filling functionality.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Filling gaps in data...", end="")
+    filled, imputed = utils.fill_gaps(data)
+    print("complete.")
+    print("Filtering for region North America...", end="")
+    raw_fdata = utils.filter_region(data, "North America")
+    fdata = utils.filter_region(filled, "North America")
+    print("complete.")
+    sparse_data = (utils.CountryData({'AFG': 'Afghanistan'},
+                                     {'AFG': {2000: 40.0, 2003: 43.0}}),
+                   data[1])
+    sparse_filled, sparse_imputed = utils.fill_gaps(sparse_data)
+    sparse_values = sparse_filled[0].country_data['AFG']
+
+    test_strings = list()
+    test_strings.append("imputed['BMU'][:4] == [1966, 1967, 1968, 1969]")
+    test_strings.append("imputed['ABW'] == []")
+    test_strings.append("1966 not in data[0].country_data['BMU']")
+    test_strings.append("len(ranking.sorted_ranking_data(raw_fdata, 1966))"
+                        " == 2")
+    test_strings.append("len(ranking.sorted_ranking_data(fdata, 1966)) == 3")
+    test_strings.append("utils.fill_gaps(data, 'linear', 4)[1]['BMU'] == "
+                        "[1966, 1967, 1968, 1969]")
+    test_strings.append("utils.fill_gaps(data, 'spline') is None")
+    test_strings.append("sparse_imputed['AFG'] == [2001, 2002]")
+    test_strings.append("sparse_values[2001] == 41.0")
+    test_strings.append("sparse_values[2002] == 42.0")
+    test_strings.append("utils.fill_gaps(sparse_data, 'linear', 1)[1]"
+                        "['AFG'] == []")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_drawdown(data):
+    """
+    Function to test drawdown episode functionality.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Filtering for all regions...", end="")
+    fdata = utils.filter_region(data, "all")
+    print("complete.")
+    print("Computing drawdown data...", end="")
+    sorted_data = drop.sorted_drawdown_data(fdata)
+    deep_data = drop.sorted_drawdown_data(fdata, 1.0, 3)
+    drop_data = drop.sorted_drop_data(fdata)
+    print("complete.")
+
+    test_strings = list()
+    test_strings.append("len(sorted_data) == 340")
+    test_strings.append("len(deep_data) == 65")
+    test_strings.append("sorted_data[0].country == drop_data[0].country")
+    test_strings.append("sorted_data[0].year2 == drop_data[0].year2")
+    test_strings.append("sorted_data[0].year3 == 2003")
+    test_strings.append("deep_data[2].country == 'Zimbabwe'")
+    test_strings.append("deep_data[2].year3 is None")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_rolling(data):
+    """
+    Function to test rolling window functionality against the
+    growth functionality it generalizes.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Filtering for all regions...", end="")
+    fdata = utils.filter_region(data, "all")
+    print("complete.")
+    print("Computing 5 year rolling data...", end="")
+    windows = rolling.rolling_data(fdata, 5)
+    print("complete.")
+    sorted_data = rolling.sorted_rolling_data(windows, 1971, "growth")
+    growth_data = growth.sorted_growth_data(fdata, 1971, 1976)
+    top_data = rolling.sorted_rolling_data(windows, 1990, "growth", 10)
+    sparse_data = (utils.CountryData({'AFG': 'Afghanistan'},
+                                     {'AFG': {2000: 40.0, 2001: 41.0,
+                                              2005: 45.0, 2010: 50.0}}),
+                   data[1])
+    sparse_windows = rolling.rolling_data(sparse_data, 1)
+    sparse_starts = [year for year in sparse_windows
+                     if sparse_windows[year] != []]
+
+    test_strings = list()
+    test_strings.append("len(windows) == 51")
+    test_strings.append("sparse_starts == [2000]")
+    test_strings.append("len(sparse_windows) == 10")
+    test_strings.append("len(sorted_data) == len(growth_data)")
+    test_strings.append("sorted_data[0].country == growth_data[0].country")
+    test_strings.append("top_data == rolling.sorted_rolling_data("
+                        "windows, 1990, 'growth')[:10]")
+    test_strings.append("rolling.sorted_rolling_data(windows, 1990, 'min')"
+                        "[-1].country == 'Rwanda'")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_load_dataset(data):
+    """
+    Function to test the asynchronous loader against read_data.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Loading data files asynchronously...", end="")
+    adata = asyncio.run(utils.load_dataset("worldbank_life_expectancy"))
+    print("complete.")
+
+    test_strings = list()
+    test_strings.append("adata[0] == data[0]")
+    test_strings.append("adata[1] == data[1]")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_revise():
+    """
+    Function to test revising a loaded data tuple in place.
+    Reads its own copy of the data since it changes it.
+    :return: None
+    """
+
+    print("Reading data files...", end="")
+    data = utils.read_data("worldbank_life_expectancy")
+    print("complete.")
+    fdata = utils.filter_region(data, "South Asia")
+    print("Revising data for Afghanistan...", end="")
+    changes = utils.revise_data(data, {"AFG": {2016: 61.0, 1960: None,
+                                               2015: 60.5},
+                                       "XXX": {2016: 1.0}})
+    print("complete.")
+
+    test_strings = list()
+    test_strings.append("len(changes) == 3")
+    test_strings.append("list(data[0].country_data['AFG'])[0] == 1961")
+    test_strings.append("list(data[0].country_data['AFG'])[-1] == 2016")
+    test_strings.append("fdata[0].country_data['AFG'][2015] == 60.5")
+    test_strings.append("ranking.sorted_ranking_data(fdata, 2016)[0]"
+                        ".country == 'Afghanistan'")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+    print("Appending 1960 from the data file...", end="")
+    changes = utils.append_years(data, "worldbank_life_expectancy", [1960])
+    print("complete.")
+
+    test_strings = list()
+    test_strings.append("changes == [('AFG', 1960)]")
+    test_strings.append("list(data[0].country_data['AFG'])[0] == 1960")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_cube(data):
+    """
+    Function to test the aggregate cube against filtering and
+    sorting the data for each group.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Building aggregate cube...", end="")
+    cube_data = cube.build_cube(data)
+    print("complete.")
+    fdata = utils.filter_region(data, "Middle East & North Africa")
+    sorted_data = ranking.sorted_ranking_data(fdata, 1977)
+    ifdata = utils.filter_income(fdata, "Upper middle income")
+
+    test_strings = list()
+    test_strings.append("cube.group_life_exp(cube_data, 1977, 'count', "
+                        "'Middle East & North Africa') == 20")
+    test_strings.append("cube.group_life_exp(cube_data, 1977, 'max', "
+                        "'Middle East & North Africa') == "
+                        "sorted_data[0].value")
+    test_strings.append("cube.group_life_exp(cube_data, 1999, 'count', "
+                        "'Middle East & North Africa', "
+                        "'Upper middle income') == 5")
+    test_strings.append("cube.group_life_exp(cube_data, 1999, 'median', "
+                        "'Middle East & North Africa', "
+                        "'Upper middle income') == "
+                        "ranking.sorted_ranking_data(ifdata, 1999)[2].value")
+    test_strings.append("cube.group_life_exp(cube_data, 1984, 'mean', "
+                        "'South Asia', 'High income') is None")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_quality():
+    """
+    Function to test the data quality scan.  Reads its own copy
+    of the data since it changes it.
+    :return: None
+    """
+
+    print("Reading data files...", end="")
+    data = utils.read_data("worldbank_life_expectancy")
+    print("complete.")
+    print("Scanning data...", end="")
+    report = quality.quality_report(quality.quality_scan(
+        data, filename="worldbank_life_expectancy"))
+    print("complete.")
+    print("Revising data for Aruba...", end="")
+    utils.revise_data(data, {"ABW": {1990: 730.0}})
+    issues = quality.quality_scan(data)
+    print("complete.")
+    sparse_data = (utils.CountryData({}, {}), data[1])
+    for code, jump in zip(["AFG", "ALB", "DZA", "AGO", "ARG", "ARM"],
+                          [1.0, 2.0, 3.0, 2.0, 1.0, 30.0]):
+        sparse_data[0].country_data[code] = {2000: 50.0, 2010: 50.0 + jump}
+    sparse_report = quality.quality_report(quality.quality_scan(sparse_data))
+
+    test_strings = list()
+    test_strings.append("report == {'jump': 49}")
+    test_strings.append("issues[0].check == 'range'")
+    test_strings.append("issues[0].year == 1990")
+    test_strings.append("quality.quality_report(issues)['jump'] == 51")
+    test_strings.append("'jump' not in sparse_report")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_sketch(data):
+    """
+    Function to test quantile sketches against the aggregate cube.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Building aggregate cube...", end="")
+    cube_data = cube.build_cube(data)
+    print("complete.")
+    print("Streaming data into exact and approximate sketches...", end="")
+    exact = sketch.sketch_groups("worldbank_life_expectancy", exact=True)
+    approximate = sketch.sketch_groups("worldbank_life_expectancy", k=20)
+    print("complete.")
+    print("Merging sketches of two halves of a series...", end="")
+    values = [float(i) for i in range(10000)]
+    first = sketch.new_sketch()
+    second = sketch.new_sketch()
+    for value in values[:5000]:
+        sketch.sketch_add(first, value)
+    for value in values[5000:]:
+        sketch.sketch_add(second, value)
+    sketch.sketch_merge(first, second)
+    print("complete.")
+    medians = 0
+    counts = 0
+    for bucket in cube_data:
+        if sketch.sketch_quantile(exact[bucket], 0.5) \
+                == cube_data[bucket].median:
+            medians += 1
+        if approximate[bucket].count == cube_data[bucket].count:
+            counts += 1
+
+    test_strings = list()
+    test_strings.append("len(exact) == len(cube_data)")
+    test_strings.append("medians == len(cube_data)")
+    test_strings.append("counts == len(cube_data)")
+    test_strings.append("first.count == 10000")
+    test_strings.append("first.size < 1000")
+    test_strings.append("abs(sketch.sketch_quantile(first, 0.5) - 5000) "
+                        "< 10000 * 1.7 / 200")
+    test_strings.append("sketch.sketch_quantile(first, -0.5) is None")
+    test_strings.append("sketch.sketch_quantile(exact[next(iter(exact))], "
+                        "-0.5) is None")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_harness(data):
+    """
+    Function to test the differential correctness harness.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Comparing engines over the real data...", end="")
+    broken = {'sorted_drop_data': lambda fdata:
+              drop.sorted_drop_data(fdata)[1:]}
+    results = harness.compare_engines(data, {"index": harness.INDEX_ENGINE,
+                                             "broken": broken})
+    print("complete.")
+    print("Comparing engines over random data...", end="")
+    random_data = harness.random_data(1)
+    random_results = harness.compare_engines(random_data,
+                                             {"index": harness.INDEX_ENGINE})
+    print("complete.")
+    engines = [(result.task, result.engine) for result in results]
+    mismatches = [len(result.mismatches) for result in results]
+    random_mismatches = [len(result.mismatches) for result in random_results]
+    broken_mismatch = results[engines.index(('sorted_drop_data',
+                                             'broken'))].mismatches[0]
+    difference = harness.first_difference(broken_mismatch.expected,
+                                          broken_mismatch.actual)
+
+    test_strings = list()
+    test_strings.append("len(results) == 6")
+    test_strings.append("('median_life_exp', 'index') in engines")
+    test_strings.append("mismatches[engines.index(('median_life_exp', "
+                        "'index'))] == 0")
+    test_strings.append("mismatches[engines.index(('sorted_drop_data', "
+                        "'broken'))] == 34")
+    test_strings.append("broken_mismatch.actual == "
+                        "broken_mismatch.expected[1:]")
+    test_strings.append("difference == (0, broken_mismatch.expected[0], "
+                        "broken_mismatch.expected[1])")
+    test_strings.append("harness.first_difference(1.5, 2.5) == "
+                        "(None, 1.5, 2.5)")
+    test_strings.append("results[0].cases == 1904")
+    test_strings.append("random_mismatches == [0, 0, 0, 0, 0]")
+    test_strings.append("harness.random_data(1)[0] == random_data[0]")
+    test_strings.append("len(random_data[0].countries) == 60")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_trend(data):
+    """
+    Function to test trend fitting and projection.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Fitting linear and piecewise-linear trends...", end="")
+    fits = trend.trend_fits(data, 1960, 2015)
+    piecewise = trend.trend_fits(data, 1960, 2015, 1990)
+    print("complete.")
+    series = data[0].country_data['USA']
+    years = sorted(series)
+    values = [series[year] for year in years]
+    regression = statistics.linear_regression(years, values)
+    correlation = statistics.correlation(years, values)
+    better = [key for key in piecewise
+              if piecewise[key].r_squared >= fits[key].r_squared - 1e-12]
+    print("Projecting five years...", end="")
+    projected = trend.project_data(data, fits, 5)
+    ranking_sdata = ranking.sorted_ranking_data(projected, 2020)
+    empty_projected = trend.project_data((utils.CountryData({}, {}), data[1]),
+                                         fits, 5)
+    print("complete.")
+
+    test_strings = list()
+    test_strings.append("len(fits) == 252")
+    test_strings.append("abs(fits['USA'].slope - regression.slope) < 1e-9")
+    test_strings.append("abs(fits['USA'].r_squared - correlation ** 2) "
+                        "< 1e-9")
+    test_strings.append("len(better) == len(piecewise)")
+    test_strings.append("piecewise['USA'].slope2 < piecewise['USA'].slope")
+    test_strings.append("trend.trend_value(fits['USA'], 2020) == "
+                        "projected[0].country_data['USA'][2020]")
+    test_strings.append("len(ranking_sdata) == len(fits)")
+    test_strings.append("ranking_sdata[0].country == 'Hong Kong SAR China'")
+    test_strings.append("2020 not in data[0].country_data['USA']")
+    test_strings.append("empty_projected[0].country_data == {}")
+    test_strings.append("trend.project_data(None, fits, 5) is None")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_events(data):
+    """
+    Function to test the threshold-crossing event index.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Indexing thresholds 30 to 85...", end="")
+    index = events.event_index(data, range(30, 86))
+    print("complete.")
+    series = data[0].country_data['USA']
+    first_year = min(year for year in series if series[year] >= 70)
+    years_above = len([year for year in series if series[year] >= 70])
+    south_asia = events.sorted_event_data(utils.filter_region(
+        data, "South Asia"), index, 70)
+    before = index[70.0]['USA']
+    print("Revising USA 1969 below 70...", end="")
+    revised = (utils.CountryData(data[0].countries,
+                                 dict(data[0].country_data)), data[1])
+    revised[0].country_data['USA'] = dict(series)
+    changes = utils.revise_data(revised, {'USA': {1969: 69.0}})
+    events.update_event_index(index, revised, changes)
+    print("complete.")
+
+    test_strings = list()
+    test_strings.append("len(index) == 56")
+    test_strings.append("before.first_year == first_year")
+    test_strings.append("before.years_above == years_above")
+    test_strings.append("before.years_above + before.years_below == 56")
+    test_strings.append("before.last_year == 1969")
+    test_strings.append("index[85.0]['USA'].first_year is None")
+    test_strings.append("south_asia[0].country == 'Sri Lanka'")
+    test_strings.append("south_asia[0].value == 1999.0")
+    test_strings.append("events.sorted_event_data(data, index, 12) is None")
+    test_strings.append("index[70.0]['USA'].last_year == 1970")
+    test_strings.append("index[70.0]['USA'].years_above == years_above - 1")
+    test_strings.append("series[1969] > 70")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_extremes(data):
+    """
+    Function to test range minimum and maximum queries.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Building range index...", end="")
+    index = extremes.range_index(data)
+    print("complete.")
+    series = data[0].country_data['RWA']
+    window = [(series[year], year) for year in series
+              if 1985 <= year <= 2000]
+    lowest = min(window)
+    highest = max(window)
+    result = extremes.range_extremes(index, 'RWA', 1985, 2000)
+    everything = extremes.batch_extremes(index, 1960, 2015)
+    north_america = extremes.sorted_extremes_data(
+        utils.filter_region(data, "North America"), index, 1960, 2015, "min")
+
+    test_strings = list()
+    test_strings.append("result.min == lowest[0]")
+    test_strings.append("result.min_year == lowest[1]")
+    test_strings.append("result.max == highest[0]")
+    test_strings.append("result.max_year == highest[1]")
+    test_strings.append("extremes.range_extremes(index, 'RWA', 1990, 1990)"
+                        ".min == series[1990]")
+    test_strings.append("extremes.range_extremes(index, 'RWA', 2020, 2030) "
+                        "is None")
+    test_strings.append("extremes.range_extremes(index, 'XXX', 1960, 2015) "
+                        "is None")
+    test_strings.append("len(everything) == 253")
+    test_strings.append("north_america[0].country == 'Canada'")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_bootstrap(data):
+    """
+    Function to test bootstrap confidence intervals of group medians.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Resampling group medians in this process...", end="")
+    years = {1960, 2000, 2015}
+    intervals = bootstrap.bootstrap_intervals(data, resamples=200, workers=1,
+                                              years=years)
+    print("complete.")
+    print("Resampling group medians on two worker processes...", end="")
+    pooled = bootstrap.bootstrap_intervals(data, resamples=200, workers=2,
+                                           years=years)
+    print("complete.")
+    cube_data = cube.build_cube(data, years)
+    medians = 0
+    bounded = 0
+    for bucket in cube_data:
+        if intervals[bucket].estimate == cube_data[bucket].median:
+            medians += 1
+        if cube_data[bucket].min <= intervals[bucket].low \
+                <= intervals[bucket].high <= cube_data[bucket].max:
+            bounded += 1
+    north_america = bootstrap.group_interval(intervals, 2000,
+                                             "North America")
+    world = bootstrap.group_interval(intervals, 2000)
+
+    test_strings = list()
+    test_strings.append("pooled == intervals")
+    test_strings.append("bootstrap.percentile([1.0, 2.0, 3.0], -0.5) is None")
+    test_strings.append("bootstrap.bootstrap_intervals(data, confidence=1.5)"
+                        " is None")
+    test_strings.append("len(intervals) == len(cube_data)")
+    test_strings.append("medians == len(cube_data)")
+    test_strings.append("bounded == len(cube_data)")
+    test_strings.append("north_america.count == 3")
+    test_strings.append("north_america.high - north_america.low "
+                        "> world.high - world.low")
+    test_strings.append("bootstrap.group_interval(intervals, 1990) is None")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_stability(data):
+    """
+    Function to test year-to-year rank correlation matrices.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Computing Spearman and Kendall matrices...", end="")
+    years, spearman = stability.rank_correlation_matrix(data)
+    years, kendall = stability.rank_correlation_matrix(data, "kendall")
+    fdata = utils.filter_region(data, "Sub-Saharan Africa")
+    filtered_years, filtered = stability.rank_correlation_matrix(fdata,
+                                                                 "kendall")
+    print("complete.")
+    print("Counting concordant pairs of 1960 and 2015 directly...", end="")
+    pairs = [(data[0].country_data[key][1960], data[0].country_data[key][2015])
+             for key in data[0].country_data
+             if 1960 in data[0].country_data[key]
+             and 2015 in data[0].country_data[key]]
+    concordance = 0
+    ties1 = 0
+    ties2 = 0
+    for i in range(len(pairs)):
+        for j in range(i + 1, len(pairs)):
+            sign1 = (pairs[i][0] > pairs[j][0]) - (pairs[i][0] < pairs[j][0])
+            sign2 = (pairs[i][1] > pairs[j][1]) - (pairs[i][1] < pairs[j][1])
+            concordance += sign1 * sign2
+            ties1 += sign1 == 0
+            ties2 += sign2 == 0
+    total = len(pairs) * (len(pairs) - 1) // 2
+    tau = concordance / ((total - ties1) * (total - ties2)) ** 0.5
+    print("complete.")
+    symmetric = [j1 for j1 in range(len(years)) for j2 in range(len(years))
+                 if kendall[j1][j2] != kendall[j2][j1]]
+
+    test_strings = list()
+    test_strings.append("len(spearman) == len(years) == 56")
+    test_strings.append("spearman[0][0] == 1.0")
+    test_strings.append("abs(kendall[0][-1] - tau) < 1e-12")
+    test_strings.append("symmetric == []")
+    test_strings.append("stability.rank_correlation_matrix(data, 'bogus') "
+                        "is None")
+    test_strings.append("spearman[0][-1] > kendall[0][-1]")
+    test_strings.append("stability.kendall_tau([1, 2, 3], [3, 2, 1]) == -1.0")
+    test_strings.append("stability.kendall_tau([1, 1, 1], [3, 2, 1]) is None")
+    test_strings.append("stability.average_ranks([5, 3, 5, 1]) "
+                        "== [3.5, 2.0, 3.5, 1.0]")
+    test_strings.append("filtered[0][-1] < kendall[0][-1]")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_dispersion(data):
+    """
+    Function to test dispersion and convergence metrics.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Computing dispersion by region and income category...", end="")
+    by_region = dispersion.dispersion_data(data)
+    by_income = dispersion.dispersion_data(data, "income")
+    print("complete.")
+    fdata = utils.filter_region(data, "all")
+    values = [fdata[0].country_data[key][2000] for key in fdata[0].country_data
+              if 2000 in fdata[0].country_data[key]]
+    mean = sum(values) / len(values)
+    gini = 0.0
+    for a in values:
+        for b in values:
+            gini += abs(a - b)
+    gini /= 2 * len(values) ** 2 * mean
+    world = by_region[(None, 2000)]
+    series = dispersion.dispersion_series(by_region, "gini")
+
+    test_strings = list()
+    test_strings.append("world.count == len(values)")
+    test_strings.append("abs(world.std - statistics.pstdev(values)) < 1e-9")
+    test_strings.append("abs(world.gini - gini) < 1e-12")
+    test_strings.append("abs(world.theil_within + world.theil_between "
+                        "- world.theil) < 1e-12")
+    test_strings.append("by_income[(None, 2000)].theil == world.theil")
+    test_strings.append("len(series) == 56")
+    test_strings.append("series[-1][1] < series[0][1]")
+    test_strings.append("dispersion.sorted_dispersion_data(by_region, 2015, "
+                        "'cv')[0].country == 'Sub-Saharan Africa'")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_releases(data):
+    """
+    Function to test the diff between two releases.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Diffing a release with itself...", end="")
+    same = releases.diff_releases("worldbank_life_expectancy",
+                                  "worldbank_life_expectancy")
+    print("complete.")
+    print("Building a revised release...", end="")
+    country_data = {}
+    for key in data[0].country_data:
+        if key != 'ABW':
+            country_data[key] = dict(data[0].country_data[key])
+    country_data['ZZZ'] = {2015: 71.0}
+    countries = dict(data[0].countries)
+    countries['ZZZ'] = "New country"
+    regions = dict(data[1].regions)
+    regions['USA'] = utils.category_code(data[1].region_names, "South Asia")
+    new = (utils.CountryData(countries, country_data),
+           utils.CountryMetadata(regions, data[1].incomes,
+                                 data[1].special_notes, data[1].num_entities,
+                                 data[1].num_countries, data[1].metadata_file,
+                                 data[1].region_names, data[1].income_names))
+    utils.revise_data(new, {'USA': {2000: 76.7, 2015: None},
+                            'CAN': {2010: data[0].country_data['CAN'][2010]
+                                    + 0.001}})
+    print("complete.")
+    diff = releases.diff_data(data, new)
+    tolerant = releases.diff_data(data, new, 0.01)
+    revised = [(revision.code, revision.year) for revision in diff.revised]
+
+    test_strings = list()
+    test_strings.append("same.added == same.removed == same.revised == []")
+    test_strings.append("diff.added == ['ZZZ']")
+    test_strings.append("diff.removed == ['ABW']")
+    test_strings.append("len(diff.reclassified) == 1")
+    test_strings.append("diff.reclassified[0].old == 'North America'")
+    test_strings.append("diff.reclassified[0].new == 'South Asia'")
+    test_strings.append("revised == [('CAN', 2010), ('USA', 2000), "
+                        "('USA', 2015)]")
+    test_strings.append("diff.revised[2].new is None")
+    test_strings.append("len(tolerant.revised) == 2")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_catalog(data):
+    """
+    Function to test the dataset catalog in a temporary folder holding two
+    copies of the data files.
+    :param data: data structures returned from reading files.
+    :return: None
+    """
+
+    print("Copying data files to a temporary folder...", end="")
+    cwd = os.getcwd()
+    folder = tempfile.mkdtemp()
+    os.mkdir(os.path.join(folder, "data"))
+    for name in ("first", "second"):
+        for suffix in ("_data.txt", "_metadata.txt"):
+            shutil.copy("data/worldbank_life_expectancy" + suffix,
+                        os.path.join(folder, "data", name + suffix))
+    open(os.path.join(folder, "data", "orphan_data.txt"), "w").close()
+    os.chdir(folder)
+    print("complete.")
+    print("Loading both datasets under a budget for one...", end="")
+    datasets = catalog.new_catalog()
+    names = datasets.names
+    first = catalog.get_dataset(datasets, "first")
+    size = datasets.sizes["first"]
+    first_equal = first[0] == data[0]
+    utils.revise_data(first, {"USA": {2000: 1.0}})
+    datasets.budget = size + size // 2
+    catalog.get_dataset(datasets, "second")
+    after_second = list(datasets.loaded)
+    cached = catalog.cache_valid(datasets, "first")
+    reloaded = catalog.get_dataset(datasets, "first")
+    after_first = list(datasets.loaded)
+    report = catalog.memory_report(datasets)
+    missing = catalog.get_dataset(datasets, "orphan")
+    print("complete.")
+    fresh = catalog.get_dataset(catalog.new_catalog(), "first")
+    print("Replacing a data file with an older copy...", end="")
+    shutil.copy("data/first_data.txt", "data/copy_data.txt")
+    os.utime("data/copy_data.txt", (0, 0))
+    os.replace("data/copy_data.txt", "data/first_data.txt")
+    replaced_cached = catalog.cache_valid(datasets, "first")
+    catalog.get_dataset(datasets, "second")
+    catalog.get_dataset(datasets, "first")
+    refreshed_cached = catalog.cache_valid(datasets, "first")
+    print("complete.")
+    os.chdir(cwd)
+    shutil.rmtree(folder)
+
+    test_strings = list()
+    test_strings.append("names == ['first', 'second']")
+    test_strings.append("first_equal")
+    test_strings.append("size > 1000000")
+    test_strings.append("after_second == ['second']")
+    test_strings.append("cached")
+    test_strings.append("reloaded[0] == data[0]")
+    test_strings.append("reloaded[1].region_names == data[1].region_names")
+    test_strings.append("after_first == ['first']")
+    test_strings.append("report == [('first', True, size, True), "
+                        "('second', False, size, True)]")
+    test_strings.append("missing is None")
+    test_strings.append("fresh[0].country_data['USA'][2000] == "
+                        "data[0].country_data['USA'][2000]")
+    test_strings.append("not replaced_cached")
+    test_strings.append("refreshed_cached")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
+def test_imports():
+    """
+    Function to test that the modules import without a display
+    (import times are machine-dependent and are checked by
+    benchmark.main instead).
+    :return: None
+    """
+
+    modules = benchmark.program_modules()
+    graphics = [module for module in modules
+                if not benchmark.headless_import(module)]
+
+    test_strings = list()
+    test_strings.append("'factors' in modules")
+    test_strings.append("'catalog' in modules")
+    test_strings.append("'test_overall' not in modules")
+    test_strings.append("graphics == []")
+
+    for test_str in test_strings:
+        print("Testing:", test_str, "->", eval(test_str))
+
+
 def test_main():
     """
     Input files are read here, and passed to
@@ -258,8 +1278,34 @@ def test_main():
     print("complete.")
 
     test_ranking(data)
+    test_rank_trajectories(data)
     test_growth(data)
     test_drop(data)
+    test_special_note(data)
+    test_shared(data)
+    test_similar(data)
+    test_compact(data)
+    test_categories(data)
+    test_quantiles(data)
+    test_fill_gaps(data)
+    test_drawdown(data)
+    test_rolling(data)
+    test_load_dataset(data)
+    test_cube(data)
+    test_quality()
+    test_sketch(data)
+    test_harness(data)
+    test_trend(data)
+    test_events(data)
+    test_extremes(data)
+    test_bootstrap(data)
+    test_stability(data)
+    test_dispersion(data)
+    test_releases(data)
+    test_catalog(data)
+    test_imports()
+    test_revise()
 
 
-test_main()
+if __name__ == '__main__':
+    test_main()
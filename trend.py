@@ -0,0 +1,241 @@
+"""
+File: trend.py
+Description: Fits linear or piecewise-linear (one breakpoint) trends in life
+expectancy over a chosen window for every country at once, by least squares
+in closed form, and projects every series a number of years past the end of
+the data so that projected years can be ranked like observed ones.
+Name: Matt Agger
+"""
+
+# Import utils and ranking
+
+from utils import *
+from ranking import *
+
+# Define structure types for TrendFit
+
+TrendFit = struct_type("TrendFit",
+                       (str, 'country'),
+                       (int, 'year1'),
+                       (int, 'year2'),
+                       ((int, NoneType), 'breakpoint'),
+                       (float, 'intercept'),
+                       (float, 'slope'),
+                       (float, 'slope2'),
+                       (float, 'r_squared'),
+                       (int, 'points'))
+
+# The fewest values a window must contain on each side of a breakpoint (and
+# the fewest values of a linear fit is one more)
+
+MIN_POINTS = 2
+
+# Define functions and procedures
+
+def trend_basis(year, year1, breakpoint):
+    """
+    Returns the terms of the trend model for a year: a constant, the years
+    since the start of the window and, for piecewise-linear trends, the years
+    since the breakpoint (0 before it).
+    :param year: the year being referenced.
+    :param year1: the starting year of the window.
+    :param breakpoint: the year the slope may change (None for linear trends).
+    :return: a list of the terms.
+    """
+    if breakpoint is None:
+        return [1.0, float(year - year1)]
+    return [1.0, float(year - year1), float(max(0, year - breakpoint))]
+
+def solve_normal(gram, moments):
+    """
+    Solves the normal equations of a least squares fit by Gaussian elimination
+    with partial pivoting.
+    :param gram: the square matrix of sums of products of the terms.
+    :param moments: the list of sums of products of the terms and the values.
+    :return: the list of coefficients, or None if the fit is not determined.
+    """
+    size = len(moments)
+    rows = [gram[i][:] + [moments[i]] for i in range(size)]
+    for column in range(size):
+        pivot = max(range(column, size), key=lambda i: abs(rows[i][column]))
+        if abs(rows[pivot][column]) < 1e-12:
+            return None
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+        for i in range(column + 1, size):
+            factor = rows[i][column] / rows[column][column]
+            for k in range(column, size + 1):
+                rows[i][k] -= factor * rows[column][k]
+    coefficients = [0.0] * size
+    for i in range(size - 1, -1, -1):
+        total = rows[i][size]
+        for k in range(i + 1, size):
+            total -= rows[i][k] * coefficients[k]
+        coefficients[i] = total / rows[i][i]
+    return coefficients
+
+def trend_fits(data, year1, year2, breakpoint=None):
+    """
+    Fits a trend to the values between two years of every country in a given
+    data tuple. The terms of the model only depend on the year, so they are
+    computed once per year column of the countries x years matrix and the sums
+    of the normal equations of every country are accumulated in the same pass.
+    :param data: the data tuple being analyzed.
+    :param year1: the starting year of the window.
+    :param year2: the ending year of the window.
+    :param breakpoint: if given, the year within the window where the slope of
+                       the trend may change (piecewise-linear trend).
+    :pre: countries with fewer than MIN_POINTS values on either side of the
+          breakpoint (or MIN_POINTS + 1 values for linear trends) are not
+          fitted.
+    :return: a dictionary mapping country codes to TrendFit structures.
+    """
+    fits = {}
+    if data is None:
+        return fits
+    years = [year for year in data_years(data) if year1 <= year <= year2]
+    codes, rows = data_matrix(data, years)
+    size = 2 if breakpoint is None else 3
+    grams = [[[0.0] * size for k in range(size)] for i in range(len(codes))]
+    moments = [[0.0] * size for i in range(len(codes))]
+    before = [0] * len(codes)
+    after = [0] * len(codes)
+    for j in range(len(years)):
+        terms = trend_basis(years[j], year1, breakpoint)
+        products = [[terms[a] * terms[b] for b in range(size)]
+                    for a in range(size)]
+        late = breakpoint is not None and years[j] > breakpoint
+        for i in range(len(codes)):
+            value = rows[i][j]
+            if value is None:
+                continue
+            gram = grams[i]
+            moment = moments[i]
+            for a in range(size):
+                moment[a] += terms[a] * value
+                for b in range(size):
+                    gram[a][b] += products[a][b]
+            if late:
+                after[i] += 1
+            else:
+                before[i] += 1
+    for i in range(len(codes)):
+        if breakpoint is None:
+            if before[i] < MIN_POINTS + 1:
+                continue
+        elif before[i] < MIN_POINTS or after[i] < MIN_POINTS:
+            continue
+        coefficients = solve_normal(grams[i], moments[i])
+        if coefficients is None:
+            continue
+        values = [value for value in rows[i] if value is not None]
+        mean = sum(values) / len(values)
+        residual = 0.0
+        total = 0.0
+        for j in range(len(years)):
+            value = rows[i][j]
+            if value is not None:
+                terms = trend_basis(years[j], year1, breakpoint)
+                fitted = sum(coefficients[a] * terms[a] for a in range(size))
+                residual += (value - fitted) ** 2
+                total += (value - mean) ** 2
+        r_squared = 1 - residual / total if total > 0 else 1.0
+        slope2 = coefficients[1]
+        if breakpoint is not None:
+            slope2 += coefficients[2]
+        fits[codes[i]] = TrendFit(data[0].countries[codes[i]], year1, year2,
+                                  breakpoint, coefficients[0],
+                                  coefficients[1], slope2, r_squared,
+                                  len(values))
+    return fits
+
+def trend_value(fit, year):
+    """
+    Computes the value of a fitted trend for a year.
+    :param fit: the TrendFit structure being referenced.
+    :param year: the year being referenced (it may be outside the window).
+    :return: the value of the trend.
+    """
+    value = fit.intercept + fit.slope * (year - fit.year1)
+    if fit.breakpoint is not None and year > fit.breakpoint:
+        value += (fit.slope2 - fit.slope) * (year - fit.breakpoint)
+    return value
+
+def project_data(data, fits, horizon):
+    """
+    Extends the series of a given data tuple with projected values for a number
+    of years past its last year, so that the result can be ranked, filtered and
+    plotted like read data (e.g. by sorted_ranking_data).
+    :param data: the data tuple being projected.
+    :param fits: the dictionary returned by trend_fits for the data tuple.
+    :param horizon: the number of years being projected.
+    :pre: countries without a fit are not projected; observed values are kept.
+    :return: a tuple containing a CountryData structure and the CountryMetadata
+             structure of the given data tuple (with nothing projected if it has
+             no values), or None if the data tuple is None.
+    """
+    if data is None:
+        return None
+    years = data_years(data)
+    if years == []:
+        return (CountryData(data[0].countries, dict(data[0].country_data)),
+                data[1])
+    last_year = years[-1]
+    country_data = {}
+    for key in data[0].country_data:
+        if key not in fits:
+            country_data[key] = data[0].country_data[key]
+            continue
+        series = dict(data[0].country_data[key])
+        for year in range(last_year + 1, last_year + horizon + 1):
+            series[year] = trend_value(fits[key], year)
+        country_data[key] = series
+    return (CountryData(data[0].countries, country_data), data[1])
+
+def sorted_trend_data(fits, stat):
+    """
+    Creates CountryValue structures for the countries in a dictionary of fits
+    and one of their statistics, and sorts them in descending order (highest to
+    lowest).
+    :param fits: the dictionary returned by trend_fits.
+    :param stat: the name of the statistic ('slope', 'slope2', 'r_squared' or
+                 'intercept').
+    :return: a list of CountryValue structures, sorted in descending order.
+    """
+    trend_sdata = []
+    for key in fits:
+        trend_sdata.append(CountryValue(fits[key].country,
+                                        getattr(fits[key], stat)))
+    return sorted(trend_sdata, key=country_value, reverse=True)
+
+def main():
+    """
+    Reads the data and metadata files; prompts the user to enter the first and
+    last year of a window (or -1 to quit) and a number of years to project;
+    and prints the ten fastest-rising countries over the window and the top ten
+    projected life expectancies for the last projected year.
+    :return: None.
+    """
+    data = read_data("worldbank_life_expectancy")
+    year1 = int(input("Enter starting year of window (-1 to quit): "))
+    while year1 != -1:
+        year2 = int(input("Enter ending year of window: "))
+        horizon = int(input("Enter number of years to project: "))
+        fits = trend_fits(data, year1, year2)
+        trend_sdata = sorted_trend_data(fits, "slope")
+        print("\nFastest rising trends from", year1, "to", year2)
+        for i in range(min(10, len(trend_sdata))):
+            print(str(i + 1) + ": " + trend_sdata[i].country,
+                  trend_sdata[i].value)
+        year = data_years(data)[-1] + horizon
+        ranking_sdata = sorted_ranking_data(project_data(data, fits, horizon),
+                                            year)
+        print("\nTop 10 Projected Life Expectancy for", year)
+        for i in range(min(10, len(ranking_sdata))):
+            print(str(i + 1) + ": " + ranking_sdata[i].country,
+                  ranking_sdata[i].value)
+        year1 = int(input("\nEnter starting year of window (-1 to quit): "))
+
+# Run program code
+
+if __name__ == '__main__':
+    main()
@@ -5,11 +5,25 @@ functions used by other program tasks.
 Name: Matt Agger
 """
 
-# Import rit_lib
+# Import rit_lib and os (mmap, asyncio and concurrent.futures are imported by
+# the functions that use them, to keep this module cheap to import)
 
 from rit_lib import *
 
-# Define structure types for CountryData, CountryMetadata, CountryValue, Range
+import os
+
+# Memory maps of the metadata files whose special notes have been requested,
+# from least to most recently used, each with the identity of the file version
+# it maps
+
+_note_maps = {}
+
+# Most metadata files kept mapped at once
+
+MAX_NOTE_MAPS = 8
+
+# Define structure types for CountryData, CountryMetadata, CountryValue, Range,
+# Drawdown
 
 CountryData = struct_type("CountryData",
                    (dict, 'countries'),
@@ -20,7 +34,10 @@ CountryMetadata = struct_type("CountryMetadata",
                               (dict, 'incomes'),
                               (dict, 'special_notes'),
                               (int, 'num_entities'),
-                              (int, 'num_countries'))
+                              (int, 'num_countries'),
+                              (str, 'metadata_file'),
+                              (list, 'region_names'),
+                              (list, 'income_names'))
 
 CountryValue = struct_type("CountryValue",
                            (str, 'country'),
@@ -33,6 +50,14 @@ Range = struct_type("Range",
                     (float, 'value1'),
                     (float, 'value2'))
 
+Drawdown = struct_type("Drawdown",
+                       (str, 'country'),
+                       (int, 'year1'),
+                       (int, 'year2'),
+                       ((int, NoneType), 'year3'),
+                       (float, 'value1'),
+                       (float, 'value2'))
+
 # Define functions and procedures
 
 def country_value(countryValue):
@@ -52,57 +77,401 @@ def range_value_drop(rangeValues):
     """
     return rangeValues.value2 - rangeValues.value1
 
-def read_data(filename):
+def header_years(header):
     """
-    Reads the data and metadata files under a given filename and stores the
-    info from each file in its respective data structure.
+    Returns the years named by the year columns of a given data file header.
+    :param header: the first line of a data file.
+    :pre: the first two columns hold the country name and code, and every
+          following non-empty column is a year.
+    :return: a list of years, in the order of their columns.
+    """
+    years = []
+    for column in header.strip().split(",")[2:]:
+        if column != "":
+            years.append(int(column))
+    return years
+
+def drawdown_depth(drawdown):
+    """
+    Returns the difference of the trough and peak values of a given Drawdown
+    structure.
+    :param drawdown: the Drawdown structure being referenced.
+    :return: the difference of the value2 and value1 components of drawdown.
+    """
+    return drawdown.value2 - drawdown.value1
+
+def data_years(data):
+    """
+    Returns every year that has a value for at least one country in a given
+    data tuple.
+    :param data: the data tuple being referenced.
+    :return: a sorted list of years.
+    """
+    years = set()
+    for key in data[0].country_data:
+        years.update(data[0].country_data[key])
+    return sorted(years)
+
+def year_span(data):
+    """
+    Returns every year from the first to the last year that has a value for at
+    least one country in a given data tuple, including the years in between
+    that have none, so that consecutive columns are consecutive years.
+    :param data: the data tuple being referenced.
+    :return: a sorted list of years.
+    """
+    years = data_years(data)
+    if years == []:
+        return years
+    return list(range(years[0], years[-1] + 1))
+
+def data_matrix(data, years):
+    """
+    Lays the values of a given data tuple out as one row per country and one
+    column per specified year, so that whole columns can be processed at once.
+    :param data: the data tuple being referenced.
+    :param years: the years forming the columns, in order.
+    :pre: a missing value is stored as None.
+    :return: a tuple containing the list of country codes and the list of rows
+             in the same order.
+    """
+    codes = []
+    rows = []
+    for key in data[0].country_data:
+        values = data[0].country_data[key]
+        codes.append(key)
+        rows.append([values.get(year) for year in years])
+    return (codes, rows)
+
+def data_rows(filename):
+    """
+    Reads the data file under a given filename one line at a time, without
+    keeping the lines that have already been read.
     :param filename: the partial name of the data files being read.
-    :return: a tuple containing a CountryData structure and a CountryMetadata
-             structure.
+    :return: a generator of (country code, country name, data) tuples, where
+             data is a dictionary of the country's years and values.
     """
     file = open("data/" + filename + "_data.txt")
-    file.readline()
-    countries = {}
-    country_data = {}
+    years = header_years(file.readline())
     for line in file:
         info = line.split(",")
-        country_name = info[0]
-        country_code = info[1]
-        i = 2
         data = {}
-        year = 1960
-        while year < 2016:
-            if info[i] != "":
-                data[year] = float(info[i])
-            i += 1
-            year += 1
+        for i in range(len(years)):
+            if info[i + 2] != "":
+                data[years[i]] = float(info[i + 2])
+        yield (info[1], info[0], data)
+    file.close()
+
+def read_country_data(filename, series=None):
+    """
+    Reads the data file under a given filename into a CountryData structure.
+    :param filename: the partial name of the data files being read.
+    :param series: if given, a function converting each country's dictionary
+                   of years and values to the mapping that is stored instead.
+    :return: a CountryData structure.
+    """
+    countries = {}
+    country_data = {}
+    for country_code, country_name, data in data_rows(filename):
         countries[country_code] = country_name
+        if series is not None:
+            data = series(data)
         country_data[country_code] = data
-    countryData = CountryData(countries, country_data)
-    file.close()
-    file = open("data/" + filename + "_metadata.txt")
-    file.readline()
+    return CountryData(countries, country_data)
+
+def read_metadata(filename):
+    """
+    Reads the metadata file under a given filename into a CountryMetadata
+    structure.
+    :param filename: the partial name of the data files being read.
+    :return: a CountryMetadata structure.
+    """
+    metadata_file = os.path.abspath("data/" + filename + "_metadata.txt")
+    file = open(metadata_file, "rb")
+    offset = len(file.readline())
     regions = {}
     incomes = {}
+    region_codes = {}
+    income_codes = {}
     special_notes = {}
     num_entities = 0
     num_countries = 0
     for line in file:
-        info = line.split(",", 3)
-        country_code = info[0]
-        region = info[1]
-        income = info[2]
-        special_note = info[3].strip("\"\n")
-        regions[country_code] = region
-        incomes[country_code] = income
-        special_notes[country_code] = special_note
+        info = line.split(b",", 3)
+        country_code = info[0].decode()
+        region = info[1].decode()
+        income = info[2].decode()
+        start = offset + len(line) - len(info[3])
+        offset += len(line)
+        if region not in region_codes:
+            region_codes[region] = len(region_codes)
+        if income not in income_codes:
+            income_codes[income] = len(income_codes)
+        regions[country_code] = region_codes[region]
+        incomes[country_code] = income_codes[income]
+        special_notes[country_code] = (start, offset)
         num_entities += 1
         if region != "":
             num_countries += 1
-    countryMetadata = CountryMetadata(regions, incomes, special_notes,
-                                      num_entities, num_countries)
     file.close()
-    return (countryData, countryMetadata)
+    return CountryMetadata(regions, incomes, special_notes, num_entities,
+                           num_countries, metadata_file, list(region_codes),
+                           list(income_codes))
+
+def read_data(filename, series=None):
+    """
+    Reads the data and metadata files under a given filename and stores the
+    info from each file in its respective data structure. The two files are
+    read and parsed concurrently and joined at the end.
+    :param filename: the partial name of the data files being read.
+    :param series: if given, a function converting each country's dictionary
+                   of years and values to the mapping that is stored instead.
+    :return: a tuple containing a CountryData structure and a CountryMetadata
+             structure.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(1) as executor:
+        countryMetadata = executor.submit(read_metadata, filename)
+        countryData = read_country_data(filename, series)
+        return (countryData, countryMetadata.result())
+
+async def load_dataset(filename, series=None):
+    """
+    Reads the data and metadata files under a given filename like read_data,
+    on a worker thread so that the running event loop is not blocked.
+    :param filename: the partial name of the data files being read.
+    :param series: if given, a function converting each country's dictionary
+                   of years and values to the mapping that is stored instead.
+    :return: a tuple containing a CountryData structure and a CountryMetadata
+             structure.
+    """
+    import asyncio
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, read_data, filename, series)
+
+def category_code(names, name):
+    """
+    Returns the integer code of a region or income category name.
+    :param names: the list of category names, indexed by code (region_names or
+                  income_names of a CountryMetadata structure).
+    :param name: the category name being looked up.
+    :return: the code of the name, or None if it is not a category.
+    """
+    if name in names:
+        return names.index(name)
+    return None
+
+def region_name(data, country_code):
+    """
+    Returns the name of the region of a country in a given data tuple.
+    :param data: the data tuple being referenced.
+    :param country_code: the code of the country being referenced.
+    :return: the region name ('' for non-country larger groupings).
+    """
+    return data[1].region_names[data[1].regions[country_code]]
+
+def income_name(data, country_code):
+    """
+    Returns the name of the income category of a country in a given data tuple.
+    :param data: the data tuple being referenced.
+    :param country_code: the code of the country being referenced.
+    :return: the income category name ('' for non-country larger groupings).
+    """
+    return data[1].income_names[data[1].incomes[country_code]]
+
+def file_identity(filename):
+    """
+    Returns what identifies the contents of a file: a file replaced by another
+    (even with its timestamps preserved) or changed in place gets a new
+    identity.
+    :param filename: the path of the file.
+    :return: a (inode, modification time in nanoseconds, size) tuple.
+    """
+    status = os.stat(filename)
+    return (status.st_ino, status.st_mtime_ns, status.st_size)
+
+def note_map(filename):
+    """
+    Returns a memory map of a metadata file, mapping it again if the file has
+    been replaced or changed since it was mapped (the old map is closed), and
+    closing the least recently used maps beyond MAX_NOTE_MAPS.
+    :param filename: the path of the metadata file.
+    :return: the memory map of the file (empty bytes for an empty file).
+    """
+    import mmap
+    identity = file_identity(filename)
+    if filename in _note_maps:
+        mapped_identity, note_file = _note_maps.pop(filename)
+        if mapped_identity == identity:
+            _note_maps[filename] = (mapped_identity, note_file)
+            return note_file
+        note_file.close()
+    if identity[2] == 0:
+        return b""
+    file = open(filename, "rb")
+    note_file = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    file.close()
+    _note_maps[filename] = (identity, note_file)
+    while len(_note_maps) > MAX_NOTE_MAPS:
+        oldest = next(iter(_note_maps))
+        _note_maps.pop(oldest)[1].close()
+    return note_file
+
+def special_note(data, country_code):
+    """
+    Returns the special note of a country in a given data tuple. Notes are not
+    kept in memory; only their byte offsets into the metadata file are, and the
+    text is fetched from a memory map of the file when it is asked for.
+    :param data: the data tuple being referenced.
+    :param country_code: the code of the country being referenced.
+    :pre: the metadata file must not have changed since the data tuple was
+          read; maps of files that changed since they were mapped are replaced.
+    :return: the special note (an empty string if the country has none), or
+             None if the country is not in the data tuple.
+    """
+    if country_code not in data[1].special_notes:
+        return None
+    start, end = data[1].special_notes[country_code]
+    return note_map(data[1].metadata_file)[start:end].decode().strip("\"\r\n")
+
+def read_year_columns(filename, years):
+    """
+    Reads only the specified year columns from the data file under a given
+    filename, without building a new data tuple.
+    :param filename: the partial name of the data files being read.
+    :param years: the years being read.
+    :pre: years that are not columns of the data file are ignored.
+    :return: a dictionary mapping each country code to a dictionary of its
+             non-empty values for the specified years.
+    """
+    file = open("data/" + filename + "_data.txt")
+    columns = {}
+    i = 2
+    for year in header_years(file.readline()):
+        if year in years:
+            columns[i] = year
+        i += 1
+    revisions = {}
+    for line in file:
+        info = line.split(",")
+        values = {}
+        for i in columns:
+            if info[i] != "":
+                values[columns[i]] = float(info[i])
+        revisions[info[1]] = values
+    file.close()
+    return revisions
+
+def revise_data(data, revisions):
+    """
+    Updates a loaded data tuple in place with new or revised values, appending
+    new years to the end of each country's data and patching existing ones.
+    :param data: the data tuple being updated.
+    :param revisions: a dictionary mapping country codes to dictionaries of
+                      years and their new values (None removes a value).
+    :pre: country codes that are not in the data tuple are ignored; data tuples
+          filtered from this one share its country data and see the update.
+    :return: a list of (country code, year) tuples whose value changed.
+    """
+    changes = []
+    for country_code in revisions:
+        if country_code not in data[0].country_data:
+            continue
+        country = data[0].country_data[country_code]
+        for year in revisions[country_code]:
+            value = revisions[country_code][year]
+            if value is None:
+                if year in country:
+                    del country[year]
+                    changes.append((country_code, year))
+            elif country.get(year) != value:
+                country[year] = value
+                changes.append((country_code, year))
+        if list(country) != sorted(country):
+            values = dict(country)
+            country.clear()
+            for year in sorted(values):
+                country[year] = values[year]
+    return changes
+
+def append_years(data, filename, years):
+    """
+    Appends newly published year columns from the data file under a given
+    filename to a loaded data tuple.
+    :param data: the data tuple being updated.
+    :param filename: the partial name of the data files being read.
+    :param years: the years being appended.
+    :return: a list of (country code, year) tuples whose value changed.
+    """
+    return revise_data(data, read_year_columns(filename, years))
+
+def fill_gaps(data, method="linear", max_gap=None):
+    """
+    Creates a copy of a given data tuple whose missing years are filled in,
+    working over the countries x years matrix once so that every later query
+    sees the same imputed values.
+    :param data: the data tuple being filled.
+    :param method: 'linear' (interpolate between the surrounding values),
+                   'nearest' (copy the closer surrounding value, the earlier
+                   one on ties) or 'ffill' (copy the previous value).
+    :param max_gap: if given, gaps of more than max_gap missing years are left
+                    empty.
+    :pre: 'linear' and 'nearest' only fill gaps between two known values;
+          'ffill' also fills the years after a country's last known value.
+          Gaps are counted in calendar years, including years no country
+          has a value for.
+          The metadata structure is shared with the given data tuple.
+    :return: a tuple containing the filled data tuple and a dictionary mapping
+             each country code to the list of its imputed years, or None if the
+             method is not valid.
+    """
+    if method not in ("linear", "nearest", "ffill"):
+        return None
+    years = year_span(data)
+    codes, rows = data_matrix(data, years)
+    country_data = {}
+    imputed = {}
+    for i in range(len(codes)):
+        row = rows[i]
+        filled = []
+        previous = None
+        following = 0
+        for j in range(len(row)):
+            if row[j] is not None:
+                previous = j
+                continue
+            if previous is None:
+                continue
+            if following <= j:
+                following = j + 1
+                while following < len(row) and row[following] is None:
+                    following += 1
+            if following == len(row):
+                if method != "ffill":
+                    break
+            gap = following - previous - 1
+            if max_gap is not None and gap > max_gap:
+                continue
+            if method == "ffill":
+                row[j] = row[previous]
+            elif method == "nearest":
+                if j - previous <= following - j:
+                    row[j] = row[previous]
+                else:
+                    row[j] = row[following]
+            else:
+                row[j] = row[previous] + (row[following] - row[previous]) \
+                         * (years[j] - years[previous]) \
+                         / (years[following] - years[previous])
+            filled.append(years[j])
+        values = {}
+        for j in range(len(row)):
+            if row[j] is not None:
+                values[years[j]] = row[j]
+        country_data[codes[i]] = values
+        imputed[codes[i]] = filled
+    countryData = CountryData(dict(data[0].countries), country_data)
+    return ((countryData, data[1]), imputed)
 
 def filter_region(data, region):
     """
@@ -118,13 +487,16 @@ def filter_region(data, region):
     if region == "":
         pass
     elif region == "all":
+        blank = category_code(data[1].region_names, "")
         for key in data[1].regions:
-            if data[1].regions[key] != "":
+            if data[1].regions[key] != blank:
                 region_filter.append(key)
     else:
-        for key in data[1].regions:
-            if data[1].regions[key] == region:
-                region_filter.append(key)
+        code = category_code(data[1].region_names, region)
+        if code is not None:
+            for key in data[1].regions:
+                if data[1].regions[key] == code:
+                    region_filter.append(key)
     if region_filter == []:
         return None
     countries = {}
@@ -144,7 +516,10 @@ def filter_region(data, region):
         num_countries += 1
     countryData = CountryData(countries, country_data)
     countryMetadata = CountryMetadata(regions, incomes, special_notes,
-                                      num_entities, num_countries)
+                                      num_entities, num_countries,
+                                      data[1].metadata_file,
+                                      data[1].region_names,
+                                      data[1].income_names)
     return (countryData, countryMetadata)
 
 def filter_income(data, income):
@@ -162,13 +537,16 @@ def filter_income(data, income):
     if income == "":
         pass
     elif income == "all":
+        blank = category_code(data[1].income_names, "")
         for key in data[1].incomes:
-            if data[1].incomes[key] != "":
+            if data[1].incomes[key] != blank:
                 income_filter.append(key)
     else:
-        for key in data[1].incomes:
-            if data[1].incomes[key] == income:
-                income_filter.append(key)
+        code = category_code(data[1].income_names, income)
+        if code is not None:
+            for key in data[1].incomes:
+                if data[1].incomes[key] == code:
+                    income_filter.append(key)
     if income_filter == []:
         return None
     countries = {}
@@ -188,7 +566,10 @@ def filter_income(data, income):
         num_countries += 1
     countryData = CountryData(countries, country_data)
     countryMetadata = CountryMetadata(regions, incomes, special_notes,
-                                      num_entities, num_countries)
+                                      num_entities, num_countries,
+                                      data[1].metadata_file,
+                                      data[1].region_names,
+                                      data[1].income_names)
     return (countryData, countryMetadata)
 
 def main():